@@ -0,0 +1,92 @@
+"""Batch analytics over folders of recorded captures: per-cell heatmaps without Qt.
+
+Examples:
+    python analyze.py rides/ --out route.npz
+    python analyze.py rides/ day2/ride7.bin --grid -10 10 0 60 0.5 1 --cartesian --workers 4
+    python analyze.py rides/ --scaling
+    python analyze.py rides/ --scaling 1 2 4 8
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from backend.batch_analysis import analyze_files, find_captures, scaling_report
+from backend.binning import CARTESIAN, POLAR
+from backend.tlv import FRAME_PERIOD
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog="\n".join(__doc__.splitlines()[2:]))
+    parser.add_argument("paths", nargs="+", type=Path,
+                        help="capture files or directories (searched recursively)")
+    parser.add_argument("--pattern", default="*.bin", help="file pattern inside directories")
+    parser.add_argument("--grid", type=float, nargs=6, default=[-12, 12, 0, 120, 1, 5],
+                        metavar=("XMIN", "XMAX", "YMIN", "YMAX", "DX", "DY"))
+    parser.add_argument("--cartesian", action="store_true", help="bin x/y instead of angle/range")
+    parser.add_argument("--frame-period", type=float, default=FRAME_PERIOD,
+                        help="seconds per frame for raw streams without a recorder index")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores, 0: in-process)")
+    parser.add_argument("--out", type=Path, help="write the per-cell statistics to this NPZ file")
+    parser.add_argument("--scaling", type=int, nargs="*", metavar="N",
+                        help="time the analysis at these worker counts (default: 1, 2, 4, ... up to "
+                             "the core count) and report the speedup over one worker")
+    parser.add_argument("--json", action="store_true", help="print the summary/scaling report as JSON")
+    parser.add_argument("--log-level", default="WARNING", choices=("DEBUG", "INFO", "WARNING", "ERROR"))
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level, format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+
+    files = find_captures(args.paths, args.pattern)
+    if not files:
+        print("No capture files found", file=sys.stderr)
+        return 2
+    x_min, x_max, y_min, y_max, dx, dy = args.grid
+    grid = {"x_min": x_min, "x_max": x_max, "y_min": y_min, "y_max": y_max, "dx": dx, "dy": dy}
+    mode = CARTESIAN if args.cartesian else POLAR
+
+    if args.scaling is not None:
+        rows = scaling_report(files, grid, mode, args.scaling or None, args.frame_period)
+        if args.json:
+            print(json.dumps(rows, indent=2))
+        else:
+            print(f"{len(files)} files")
+            print(f"{'workers':>7} {'seconds':>9} {'frames/s':>10} {'MB/s':>8} {'speedup':>8} {'eff':>6}")
+            for r in rows:
+                # Fewer files than workers: show the processes that actually ran
+                workers = str(r['workers']) if r['effective_workers'] == r['workers'] else \
+                    f"{r['effective_workers']} ({r['workers']})"
+                print(f"{workers:>7} {r['seconds']:>9.2f} {r['frames_per_s']:>10.0f} "
+                      f"{r['mb_per_s']:>8.1f} {r['speedup']:>7.2f}x {r['efficiency']:>6.0%}")
+        return 0
+
+    stats, elapsed = analyze_files(files, grid, mode, args.workers, args.frame_period)
+    if args.out:
+        stats.save(args.out, grid=np.array(args.grid), mode=mode)
+
+    summary = {
+        "files": stats.files,
+        "frames": stats.frames,
+        "errors": stats.errors,
+        "mb": round(stats.bytes / 1e6, 1),
+        "seconds": round(elapsed, 3),
+        "frames_per_s": round(stats.frames / elapsed) if elapsed else 0,
+        "track_hits": int(stats.track_hits.sum()),
+        "occupied_cells": int((stats.occupied_frames > 0).sum()),
+        "busiest_cell_dwell_s": round(float(stats.dwell_s.max()), 2),
+    }
+    if args.json:
+        print(json.dumps(summary))
+    else:
+        print(f"{summary['files']} files, {summary['frames']} frames ({summary['mb']} MB) in "
+              f"{summary['seconds']} s: {summary['frames_per_s']} frames/s; {summary['errors']} errors, "
+              f"{summary['occupied_cells']} occupied cells, busiest dwell {summary['busiest_cell_dwell_s']} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,33 +1,76 @@
+import logging
 import sys
 from PySide6.QtWidgets import QApplication
 from backend.grid_backend import GridBackend
+from backend.multi_radar import MultiRadarManager, RadarSensor
+from backend.simulator import RadarSimulator
+from backend.sources import SerialSource, SocketSource, SyntheticSource
 from frontend.main_window import MainWindow
 from pathlib import Path
 
+# Data source: "serial" (radar on CONFIG_PORT/DATA_PORT), "replay" (CAPTURE_FILE),
+# "tcp" (UART-to-network bridge or `python -m backend.simulator`), "sim" (in-process)
+# or "multi" (every radar in SENSORS, fused into one grid)
+SOURCE = "serial"
+
+CONFIG_PORT = "COM19"  # Replace with your actual config port
+DATA_PORT = "COM20"    # Replace with your actual data port
+CONFIG_FILE = Path("AOP_6m_default.cfg")  # Replace with actual path
+CAPTURE_FILE = Path("capture.bin")
+TCP_HOST, TCP_PORT = "127.0.0.1", 5000
+SIM_TARGETS = 5
+
+LOG_LEVEL = logging.INFO  # DEBUG logs a line per decoded frame
+TRACE_FILE = None         # e.g. Path("trace.jsonl") to write per-frame trace records
+TRACE_EVERY = 1           # trace every N-th frame
+METRICS_PORT = None       # e.g. 9108 to serve /metrics for Prometheus on localhost
+STREAM_PORT = None        # e.g. 9109 to stream the grid to remote viewers (python -m backend.grid_stream)
+
+# Multi-radar setup: mount = (x, y, z, yaw deg) of each sensor on the bike
+SENSORS = [
+    RadarSensor("front", data_port="COM20", config_port="COM19",
+                config_file=CONFIG_FILE, mount=(0.0, 0.5, 0.0, 0.0)),
+    RadarSensor("rear", data_port="COM22", config_port="COM21",
+                config_file=CONFIG_FILE, mount=(0.0, -0.5, 0.0, 180.0)),
+]
+
+
 def main():
+    logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(name)s %(levelname)s: %(message)s")
     app = QApplication(sys.argv)
 
     backend = GridBackend()
-    window = MainWindow(backend)
+    if TRACE_FILE:
+        backend.start_tracing(TRACE_FILE, TRACE_EVERY)
+    if METRICS_PORT:
+        backend.serve_metrics(METRICS_PORT)
+    if STREAM_PORT:
+        backend.serve_grid_stream(STREAM_PORT)
+    window = MainWindow(backend, display_rate=30.0)  # Hz; 0 repaints on every frame
+    # Write out a session export still running when the window closes
+    app.aboutToQuit.connect(backend.stop_export)
 
     window.resize(900, 600)
     window.show()
-  
-
-    #hi
-    # After window.show()
-    CONFIG_PORT = "COM19"  # Replace with your actual config port
-    DATA_PORT = "COM20"    # Replace with your actual data port
-    CONFIG_FILE = Path("AOP_6m_default.cfg")  # Replace with actual path
-
-    # Send configuration
-    backend.send_config(CONFIG_PORT, CONFIG_FILE)
 
-    # Start reading radar data
-    backend.start_reading(DATA_PORT)
+    if SOURCE == "serial":
+        # Send configuration
+        backend.send_config(CONFIG_PORT, CONFIG_FILE)
+        # Start reading radar data
+        backend.start_source(SerialSource(DATA_PORT))
+    elif SOURCE == "replay":
+        backend.start_replay(CAPTURE_FILE, speed=1.0)
+    elif SOURCE == "tcp":
+        backend.start_source(SocketSource(TCP_HOST, TCP_PORT))
+    elif SOURCE == "sim":
+        backend.start_source(SyntheticSource(RadarSimulator(SIM_TARGETS)))
+    elif SOURCE == "multi":
+        radars = MultiRadarManager(backend, SENSORS)
+        radars.configure()
+        radars.start()
 
     sys.exit(app.exec())
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
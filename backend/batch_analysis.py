@@ -0,0 +1,308 @@
+"""Offline analytics over folders of recorded captures.
+
+Every file is scanned in a worker process and reduced to per-cell
+statistics on the ``create_grid`` lattice; the per-file results are then
+summed. Two input layouts are accepted:
+
+- FrameRecorder captures (``*.bin`` + ``*.bin.idx``): frames are zero-copy
+  views into an mmap of the data file, and dwell time comes from the
+  recorded timestamps;
+- raw UART byte streams: the mmap is fed through FrameSynchronizer in
+  slices, and every frame counts as ``frame_period`` seconds.
+
+Per-frame work is only the TLV decode and the binning; counts are gathered
+for ``CHUNK_FRAMES`` frames at a time and folded in with one ``bincount``
+per statistic.
+"""
+import logging
+import mmap
+import multiprocessing as mp
+import os
+import time
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+
+from backend.binning import GridBinner, POLAR
+from backend.frame_sync import FrameSynchronizer
+from backend.recording import FILE_MAGIC, INDEX_SUFFIX, index_path, read_index
+from backend.tlv import FRAME_PERIOD, decode_frame
+
+log = logging.getLogger(__name__)
+
+CHUNK_FRAMES = 1024
+READ_SIZE = 4096             # bytes fed to the synchronizer between drains (raw streams)
+MAX_GAP = 1.0                # s; longer gaps between frames (recording paused) count as this
+MIN_CONFIDENCE = 0.5
+
+# Per-cell arrays of CellStats, in save() order
+CELL_FIELDS = ("track_hits", "occupied_frames", "dwell_s", "point_hits", "speed_sum", "speed_sq_sum", "speed_max")
+
+
+class CellStats:
+    """Per-cell occupancy counts, dwell time and track speed statistics.
+
+    ``track_hits``: confident track observations; ``occupied_frames``: frames
+    with at least one track in the cell; ``dwell_s``: seconds the cell was
+    occupied; ``point_hits``: point-cloud detections; ``speed_*``: ground
+    speed (m/s) of the track observations.
+    """
+
+    def __init__(self, ny, nx):
+        self.shape = (ny, nx)
+        self.track_hits = np.zeros((ny, nx), dtype=np.int64)
+        self.occupied_frames = np.zeros((ny, nx), dtype=np.int64)
+        self.dwell_s = np.zeros((ny, nx), dtype=np.float64)
+        self.point_hits = np.zeros((ny, nx), dtype=np.int64)
+        self.speed_sum = np.zeros((ny, nx), dtype=np.float64)
+        self.speed_sq_sum = np.zeros((ny, nx), dtype=np.float64)
+        self.speed_max = np.zeros((ny, nx), dtype=np.float32)
+
+        self.files = 0
+        self.frames = 0
+        self.bytes = 0
+        self.errors = 0
+
+    def merge(self, other):
+        """Add ``other`` (same grid) into this one."""
+        if other.shape != self.shape:
+            raise ValueError(f"Cannot merge {other.shape} statistics into {self.shape}")
+        for name in CELL_FIELDS[:-1]:
+            getattr(self, name).__iadd__(getattr(other, name))
+        np.maximum(self.speed_max, other.speed_max, out=self.speed_max)
+        self.files += other.files
+        self.frames += other.frames
+        self.bytes += other.bytes
+        self.errors += other.errors
+        return self
+
+    def mean_speed(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.speed_sum / self.track_hits
+
+    def speed_std(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self.speed_sum / self.track_hits
+            return np.sqrt(np.maximum(self.speed_sq_sum / self.track_hits - mean * mean, 0.0))
+
+    def save(self, path, **meta):
+        """Write all arrays (plus derived mean/std speed and ``meta``) to an NPZ file."""
+        np.savez_compressed(
+            path,
+            **{name: getattr(self, name) for name in CELL_FIELDS},
+            mean_speed=self.mean_speed(), speed_std=self.speed_std(),
+            files=self.files, frames=self.frames, bytes=self.bytes, errors=self.errors,
+            **meta,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            stats = cls(*data["track_hits"].shape)
+            for name in CELL_FIELDS:
+                getattr(stats, name)[...] = data[name]
+            for name in ("files", "frames", "bytes", "errors"):
+                setattr(stats, name, int(data[name]))
+        return stats
+
+
+class _Accumulator:
+    """Collects the cells hit by a run of frames and folds them into CellStats."""
+
+    def __init__(self, stats, binner):
+        self.stats = stats
+        self.binner = binner
+        self.size = stats.track_hits.size
+        self._reset()
+
+    def _reset(self):
+        self.track_cells, self.speeds, self.track_dt, self.track_frame = [], [], [], []
+        self.point_cells = []
+        self.n = 0
+
+    def add(self, frame, dt):
+        binner = self.binner
+        tracks = frame.tracks[frame.tracks['confidence'] >= MIN_CONFIDENCE]
+        if len(tracks):
+            pos, vel = tracks['pos'], tracks['vel']
+            ix, iy, inside = binner.cells(pos[:, 0], pos[:, 1])
+            cells = (iy * binner.nx + ix)[inside]
+            self.track_cells.append(cells)
+            self.speeds.append(np.hypot(vel[inside, 0], vel[inside, 1]))
+            self.track_dt.append(np.full(len(cells), dt))
+            self.track_frame.append(np.full(len(cells), self.n, dtype=np.int64))
+        if len(frame.points):
+            pix, piy = binner.bin_points(frame.points)
+            self.point_cells.append(piy * binner.nx + pix)
+        self.n += 1
+        self.stats.frames += 1
+        if self.n >= CHUNK_FRAMES:
+            self.flush()
+
+    def flush(self):
+        s, size = self.stats, self.size
+        if self.track_cells:
+            cells = np.concatenate(self.track_cells)
+            speeds = np.concatenate(self.speeds)
+            _flat(s.track_hits)[:] += np.bincount(cells, minlength=size)
+            _flat(s.speed_sum)[:] += np.bincount(cells, speeds, minlength=size)
+            _flat(s.speed_sq_sum)[:] += np.bincount(cells, speeds * speeds, minlength=size)
+            np.maximum.at(_flat(s.speed_max), cells, speeds.astype(np.float32))
+
+            # A cell is occupied once per frame however many tracks are in it
+            keys, first = np.unique(np.concatenate(self.track_frame) * size + cells, return_index=True)
+            occupied = keys % size
+            _flat(s.occupied_frames)[:] += np.bincount(occupied, minlength=size)
+            _flat(s.dwell_s)[:] += np.bincount(occupied, np.concatenate(self.track_dt)[first], minlength=size)
+        if self.point_cells:
+            _flat(s.point_hits)[:] += np.bincount(np.concatenate(self.point_cells), minlength=size)
+        self._reset()
+
+
+def _flat(a):
+    """1-D view of a contiguous per-cell array."""
+    return a.reshape(-1)
+
+
+def find_captures(paths, pattern="*.bin"):
+    """Expand directories (recursively, by ``pattern``) into a sorted list of files.
+
+    Recording index sidecars (``*.bin.idx``) are skipped, however broad ``pattern`` is.
+    """
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(p for p in path.rglob(pattern) if p.is_file() and p.suffix != INDEX_SUFFIX)
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def _indexed_frames(view, path):
+    """Frames and per-frame durations of a FrameRecorder capture."""
+    index = read_index(path)
+    timestamps = index['timestamp']
+    dt = np.clip(np.diff(timestamps, append=timestamps[-1:] + FRAME_PERIOD), 0.0, MAX_GAP) \
+        if len(index) else np.empty(0)
+    for offset, length, frame_dt in zip(index['offset'].tolist(), index['length'].tolist(), dt.tolist()):
+        yield view[offset:offset + length], frame_dt
+
+
+def _stream_frames(view, frame_period):
+    """Frames of a raw byte stream, each lasting ``frame_period``."""
+    sync = FrameSynchronizer()
+    for start in range(0, len(view), READ_SIZE):
+        chunk = view[start:start + READ_SIZE]
+        while len(chunk):
+            chunk = chunk[sync.feed(chunk):]
+            while (frame := sync.next_frame()) is not None:
+                yield frame, frame_period
+
+
+def analyze_file(path, grid, mode=POLAR, frame_period=FRAME_PERIOD):
+    """Reduce one capture to CellStats on the grid described by ``grid`` (create_grid keys)."""
+    binner = GridBinner(grid["x_min"], grid["x_max"], grid["y_min"], grid["y_max"],
+                        grid["dx"], grid["dy"], mode)
+    stats = CellStats(binner.ny, binner.nx)
+    acc = _Accumulator(stats, binner)
+
+    path = Path(path)
+    with path.open('rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        stats.files, stats.bytes = 1, size
+        if size == 0:
+            return stats
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                if mm[:len(FILE_MAGIC)] == FILE_MAGIC and index_path(path).exists():
+                    frames = _indexed_frames(view, path)
+                else:
+                    frames = _stream_frames(view, frame_period)
+                for data, dt in frames:
+                    try:
+                        frame = decode_frame(data)
+                    except ValueError:
+                        stats.errors += 1
+                        continue
+                    acc.add(frame, dt)
+                acc.flush()
+            finally:
+                # Decoded arrays are views into the mmap: drop them before it closes
+                frames = data = frame = None
+                view.release()
+    return stats
+
+
+def _analyze_one(path, grid, mode, frame_period):
+    try:
+        return analyze_file(path, grid, mode, frame_period)
+    except (OSError, ValueError) as e:
+        log.error(f"Skipping {path}: {e}")
+        return None
+
+
+def worker_count(workers, num_files):
+    """Worker processes ``analyze_files`` starts for ``workers`` (at most one per file; 0 = in-process)."""
+    if workers == 0:
+        return 0
+    return min(workers or os.cpu_count() or 1, num_files) or 1
+
+
+def analyze_files(paths, grid, mode=POLAR, workers=None, frame_period=FRAME_PERIOD):
+    """Analyze ``paths`` with ``workers`` processes (default: all cores) and sum the results.
+
+    Returns (CellStats, elapsed seconds). ``workers=0`` runs in this process;
+    no more processes than files are started (see ``worker_count``).
+    """
+    binner = GridBinner(grid["x_min"], grid["x_max"], grid["y_min"], grid["y_max"],
+                        grid["dx"], grid["dy"], mode)
+    total = CellStats(binner.ny, binner.nx)
+    job = partial(_analyze_one, grid=grid, mode=mode, frame_period=frame_period)
+
+    start = time.perf_counter()
+    if workers == 0:
+        results = map(job, paths)
+        for stats in results:
+            if stats is not None:
+                total.merge(stats)
+    else:
+        workers = worker_count(workers, len(paths))
+        # Largest files first so one big capture does not finish last on its own
+        paths = sorted(paths, key=lambda p: Path(p).stat().st_size, reverse=True)
+        with mp.get_context('spawn').Pool(workers) as pool:
+            for stats in pool.imap_unordered(job, paths):
+                if stats is not None:
+                    total.merge(stats)
+    return total, time.perf_counter() - start
+
+
+def scaling_report(paths, grid, mode=POLAR, worker_counts=None, frame_period=FRAME_PERIOD):
+    """Time ``analyze_files`` at each worker count.
+
+    Returns a list of dicts with the requested and effective worker count,
+    seconds, frames/s, MB/s, speedup and parallel efficiency. Speedup is
+    measured against a 1-worker run, which always comes first (it is added
+    if ``worker_counts`` lacks it); efficiency divides it by the effective
+    worker count (an in-process run counts as one).
+    """
+    if worker_counts is None:
+        cpus = os.cpu_count() or 1
+        worker_counts = [2 ** i for i in range(1, cpus.bit_length()) if 2 ** i <= cpus] + [cpus]
+    worker_counts = [1, *dict.fromkeys(w for w in worker_counts if w != 1)]
+    rows = []
+    for workers in worker_counts:
+        stats, elapsed = analyze_files(paths, grid, mode, workers, frame_period)
+        rows.append({
+            "workers": workers,
+            "effective_workers": worker_count(workers, len(paths)),
+            "seconds": elapsed,
+            "frames_per_s": stats.frames / elapsed if elapsed else 0.0,
+            "mb_per_s": stats.bytes / 1e6 / elapsed if elapsed else 0.0,
+        })
+    base = rows[0]["seconds"]
+    for row in rows:
+        row["speedup"] = base / row["seconds"] if row["seconds"] else 0.0
+        row["efficiency"] = row["speedup"] / max(row["effective_workers"], 1)
+    return rows
@@ -0,0 +1,159 @@
+"""Live per-cell statistics behind the bin inspection of the Auto/Manual modes.
+
+Every confident track observation is counted in two sets of preallocated
+arrays, with one ``np.add.at`` per lattice and frame:
+
+- the current ``create_grid`` lattice, so the statistics of any cell are
+  an O(1) lookup (``cell``);
+- a fixed fine lattice in radar x/y (``BASE_CELL`` m over ``BASE_EXTENT``)
+  that never changes.
+
+When the grid changes resolution, extent or binning mode, ``set_grid``
+rebuilds the grid arrays by summing the base cells into the new cells (one
+``bincount`` per statistic), so the history carries over without replaying
+frames. Observations from before a grid change are placed at the mean
+position of their base cell, so a new cell edge splitting a base cell
+can misplace some of them; observations outside the base lattice only
+count on the grid they were made on.
+"""
+import threading
+
+import numpy as np
+
+from backend.tlv import FRAME_PERIOD
+
+BASE_EXTENT = (-50.0, 50.0, 0.0, 200.0)   # x_min, x_max, y_min, y_max (m)
+BASE_CELL = 0.5                           # m
+MIN_CONFIDENCE = 0.5                      # tracks counted, as for the occupancy grid
+MAX_GAP = 1.0                             # s; longer gaps between frames count as this
+
+# Rows of _Cells.sums
+HITS, DWELL, SPEED, CONFIDENCE, X, Y = range(6)
+
+
+class _Cells:
+    """Statistics arrays of one (ny, nx) lattice.
+
+    ``sums`` has one column per (flat) cell: confident track observations
+    (HITS), track-seconds spent in the cell (DWELL), and the SPEED,
+    CONFIDENCE and X/Y sums for the means. ``last_seen``/``last_seen_t``:
+    frame number and time of the newest observation (-1/NaN if never).
+    """
+
+    def __init__(self, ny, nx):
+        self.shape = (ny, nx)
+        self.sums = np.zeros((6, ny * nx), dtype=np.float64)
+        self.last_seen = np.full(ny * nx, -1, dtype=np.int64)
+        self.last_seen_t = np.full(ny * nx, np.nan, dtype=np.float64)
+
+    def add(self, cells, values, frame_num, timestamp):
+        """Count one frame's observations (columns of ``values``) in the flat cell indices ``cells``."""
+        np.add.at(self.sums, (slice(None), cells), values)
+        self.last_seen[cells] = frame_num
+        self.last_seen_t[cells] = timestamp
+
+
+class BinStatistics:
+    """Per-cell hit count, dwell time, mean speed/confidence and last sighting."""
+
+    def __init__(self, extent=BASE_EXTENT, base_cell=BASE_CELL):
+        self.base_x_min, x_max, self.base_y_min, y_max = extent
+        self.base_cell = base_cell
+        self.base_nx = int(round((x_max - self.base_x_min) / base_cell))
+        self.base_ny = int(round((y_max - self.base_y_min) / base_cell))
+        self.base = _Cells(self.base_ny, self.base_nx)
+
+        self.binner = None
+        self.grid = None
+        self.frames = 0
+        self.last_frame_num = -1
+        self.last_timestamp = None
+        self._lock = threading.Lock()   # publisher thread vs. set_grid/cell from the GUI
+
+    def set_grid(self, binner):
+        """Switch to ``binner``'s lattice, carrying the statistics over from the base lattice."""
+        grid = _Cells(binner.ny, binner.nx)
+        with self._lock:
+            base = self.base
+            sums = base.sums
+            occupied = np.flatnonzero(sums[HITS])
+            hits = sums[HITS][occupied]
+            ix, iy, inside = binner.cells(sums[X][occupied] / hits, sums[Y][occupied] / hits)
+            source = occupied[inside]
+            cells = (iy * binner.nx + ix)[inside]
+
+            size = binner.ny * binner.nx
+            for row in range(len(sums)):
+                grid.sums[row] = np.bincount(cells, sums[row][source], minlength=size)
+            np.maximum.at(grid.last_seen, cells, base.last_seen[source])
+            np.fmax.at(grid.last_seen_t, cells, base.last_seen_t[source])
+
+            self.binner, self.grid = binner, grid
+
+    def update(self, tracks, timestamp, frame_num, cells=None):
+        """Count a frame's confident TRACK_DTYPE tracks.
+
+        ``cells`` may pass the (binner, ix, iy, inside) the caller already got
+        from ``binner.cells`` for these tracks, which must then be the
+        confident ones; it is used if ``binner`` is the current grid's.
+        """
+        if cells is None:
+            tracks = tracks[tracks['confidence'] >= MIN_CONFIDENCE]
+        with self._lock:
+            dt = FRAME_PERIOD if self.last_timestamp is None else \
+                min(max(timestamp - self.last_timestamp, 0.0), MAX_GAP)
+            self.last_timestamp = timestamp
+            self.last_frame_num = frame_num
+            self.frames += 1
+            if len(tracks) == 0:
+                return
+
+            x, y = tracks['pos'][:, 0], tracks['pos'][:, 1]
+            values = np.empty((6, len(tracks)), dtype=np.float64)
+            values[HITS] = 1.0
+            values[DWELL] = dt
+            values[SPEED] = np.hypot(tracks['vel'][:, 0], tracks['vel'][:, 1])
+            values[CONFIDENCE] = tracks['confidence']
+            values[X] = x
+            values[Y] = y
+
+            bx = np.floor((x - self.base_x_min) / self.base_cell).astype(np.intp)
+            by = np.floor((y - self.base_y_min) / self.base_cell).astype(np.intp)
+            inside = (bx >= 0) & (bx < self.base_nx) & (by >= 0) & (by < self.base_ny)
+            self.base.add((by * self.base_nx + bx)[inside], values[:, inside], frame_num, timestamp)
+
+            binner = self.binner
+            if binner is not None:
+                if cells is not None and cells[0] is binner:
+                    _, ix, iy, inside = cells
+                else:
+                    ix, iy, inside = binner.cells(x, y)
+                self.grid.add((iy * binner.nx + ix)[inside], values[:, inside], frame_num, timestamp)
+
+    def cell(self, ix, iy):
+        """Statistics of grid cell (ix, iy) as a dict, or None outside the grid."""
+        with self._lock:
+            grid = self.grid
+            if grid is None or not (0 <= iy < grid.shape[0] and 0 <= ix < grid.shape[1]):
+                return None
+            cell = iy * grid.shape[1] + ix
+            sums = grid.sums[:, cell]
+            hits = int(sums[HITS])
+            return {
+                "track_hits": hits,
+                "dwell_s": float(sums[DWELL]),
+                "mean_speed": float(sums[SPEED]) / hits if hits else float('nan'),
+                "mean_confidence": float(sums[CONFIDENCE]) / hits if hits else float('nan'),
+                "last_seen": int(grid.last_seen[cell]),
+                "age_s": self.last_timestamp - float(grid.last_seen_t[cell]) if hits else float('nan'),
+            }
+
+    def reset(self):
+        """Forget all statistics (keeps the grid)."""
+        with self._lock:
+            self.base = _Cells(self.base_ny, self.base_nx)
+            if self.grid is not None:
+                self.grid = _Cells(*self.grid.shape)
+            self.frames = 0
+            self.last_frame_num = -1
+            self.last_timestamp = None
@@ -0,0 +1,85 @@
+import numpy as np
+
+# Binning modes
+CARTESIAN = "cartesian"  # grid X/Y are the radar's x/y in meters
+POLAR = "polar"          # grid X is azimuth (deg), grid Y is ground range (m)
+
+# Binned target as sent to the frontend
+GRID_POINT_DTYPE = np.dtype([
+    ('id', '<u4'),       # Target ID
+    ('ix', '<i4'),       # Grid column
+    ('iy', '<i4'),       # Grid row
+    ('x_real', '<f4'),   # Real-world X (m)
+    ('y_real', '<f4'),   # Real-world Y (m)
+])
+
+
+class GridBinner:
+    """Maps radar x/y positions onto the ``create_grid`` lattice.
+
+    Bin edges are computed once per grid, so binning a frame is a coordinate
+    conversion plus one ``searchsorted`` per axis. In POLAR mode positions
+    are converted to azimuth (degrees, 0 = boresight, positive towards +x)
+    and ground range before binning.
+    """
+
+    def __init__(self, x_min, x_max, y_min, y_max, dx, dy, mode=POLAR, clamp=True):
+        if mode not in (CARTESIAN, POLAR):
+            raise ValueError(f"Unknown binning mode: {mode}")
+        self.mode = mode
+        self.clamp = clamp
+        self.nx = int((x_max - x_min) / dx)
+        self.ny = int((y_max - y_min) / dy)
+
+        # Bin-edge lookup tables
+        self.x_edges = x_min + np.arange(self.nx + 1, dtype=np.float32) * np.float32(dx)
+        self.y_edges = y_min + np.arange(self.ny + 1, dtype=np.float32) * np.float32(dy)
+
+    def to_grid_coords(self, x, y):
+        """Convert radar x/y (m) to grid-axis coordinates for the current mode."""
+        if self.mode == CARTESIAN:
+            return x, y
+        return np.degrees(np.arctan2(x, y)), np.hypot(x, y)
+
+    def cells(self, x, y):
+        """Return (ix, iy, inside) cell indices for radar x/y arrays.
+
+        With ``clamp`` set, positions outside the grid are pinned to the edge
+        cells; ``inside`` is always the unclamped in-grid mask.
+        """
+        u, v = self.to_grid_coords(x, y)
+        ix = np.searchsorted(self.x_edges, u, side='right') - 1
+        iy = np.searchsorted(self.y_edges, v, side='right') - 1
+        inside = (ix >= 0) & (ix < self.nx) & (iy >= 0) & (iy < self.ny)
+        if self.clamp:
+            np.clip(ix, 0, self.nx - 1, out=ix)
+            np.clip(iy, 0, self.ny - 1, out=iy)
+        return ix, iy, inside
+
+    def bin_tracks(self, tracks, min_confidence=0.5):
+        """Bin TRACK_DTYPE targets into GRID_POINT_DTYPE records.
+
+        Targets below ``min_confidence`` are dropped, as are out-of-grid
+        targets when clamping is off.
+        """
+        tracks = tracks[tracks['confidence'] >= min_confidence]
+        pos = tracks['pos']
+        ix, iy, inside = self.cells(pos[:, 0], pos[:, 1])
+        if not self.clamp:
+            tracks, pos, ix, iy = tracks[inside], pos[inside], ix[inside], iy[inside]
+
+        out = np.empty(len(tracks), dtype=GRID_POINT_DTYPE)
+        out['id'] = tracks['tid']
+        out['ix'] = ix
+        out['iy'] = iy
+        out['x_real'] = pos[:, 0]
+        out['y_real'] = pos[:, 1]
+        return out
+
+    def bin_points(self, points):
+        """Return (ix, iy) cell indices of the in-grid POINT_DTYPE points.
+
+        Raw detections are never clamped; points outside the grid are dropped.
+        """
+        ix, iy, inside = self.cells(points['x'], points['y'])
+        return ix[inside], iy[inside]
@@ -0,0 +1,180 @@
+"""Approaching-vehicle warnings from tracker output (TLV 1010).
+
+Every track is assessed at once from its position, velocity and
+acceleration columns, relative to the radar at the origin:
+
+- range rate: (p . v) / |p|, negative while closing;
+- time to collision: first positive root of r + r' t + a_r t^2 / 2 = 0,
+  with a_r the radial acceleration (constant-velocity -r / r' when a_r ~ 0);
+- lateral clearance: distance at the closest point of approach of the
+  constant-velocity path.
+
+A track's alert level rises when its TTC and clearance drop below the
+CAUTION/WARNING thresholds. It is kept while both stay below the
+thresholds times ``hysteresis`` and falls as soon as either exceeds that,
+so alerts do not flicker on noisy tracks.
+"""
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+NONE, CAUTION, WARNING = 0, 1, 2
+LEVEL_NAMES = {NONE: "none", CAUTION: "caution", WARNING: "warning"}
+
+THREAT_DTYPE = np.dtype([
+    ('tid', '<u4'),
+    ('range', '<f4'),       # m
+    ('range_rate', '<f4'),  # m/s, negative = closing
+    ('ttc', '<f4'),         # s, inf if not closing
+    ('clearance', '<f4'),   # m, miss distance at the closest point of approach
+    ('level', 'u1'),        # NONE / CAUTION / WARNING
+])
+
+
+@dataclass
+class Alert:
+    """A change of a track's alert level."""
+    tid: int
+    level: int
+    previous: int
+    range: float
+    ttc: float
+    clearance: float
+    timestamp: float
+
+
+class CollisionWarning:
+    """Computes per-track threat metrics and alert levels, frame by frame."""
+
+    def __init__(self, ttc_caution=6.0, ttc_warning=3.0, clearance_caution=2.5,
+                 clearance_warning=1.5, min_closing_speed=1.0, hysteresis=1.25):
+        self.ttc_caution = ttc_caution
+        self.ttc_warning = ttc_warning
+        self.clearance_caution = clearance_caution
+        self.clearance_warning = clearance_warning
+        self.min_closing_speed = min_closing_speed
+        self.hysteresis = hysteresis
+
+        self.threats = np.empty(0, dtype=THREAT_DTYPE)   # assessment of the latest frame
+        self.level = NONE                                # highest level in the latest frame
+        self._tids = np.empty(0, dtype=np.uint32)       # alerting tracks, sorted, for hysteresis
+        self._levels = np.empty(0, dtype=np.uint8)       # and their levels
+        self._lock = threading.Lock()
+
+    def update(self, tracks, timestamp=0.0):
+        """Assess one frame's tracks (TRACK_DTYPE). Returns the Alerts whose level changed."""
+        if not len(tracks) and not len(self._tids):
+            # Nothing to assess and no alert to clear
+            with self._lock:
+                self.threats = np.empty(0, dtype=THREAT_DTYPE)
+                self.level = NONE
+            return []
+        threats = assess(tracks, self.min_closing_speed)
+
+        with self._lock:
+            previous = np.zeros(len(threats), dtype=np.uint8)
+            still_tracked = np.zeros(len(self._tids), dtype=bool)
+            if len(self._tids):
+                i = np.minimum(np.searchsorted(self._tids, threats['tid']), len(self._tids) - 1)
+                found = self._tids[i] == threats['tid']
+                previous[found] = self._levels[i[found]]
+                still_tracked[i[found]] = True
+            threats['level'] = self._classify(threats['ttc'], threats['clearance'], previous)
+
+            alerts = [
+                Alert(int(t['tid']), int(t['level']), int(p), float(t['range']),
+                      float(t['ttc']), float(t['clearance']), timestamp)
+                for t, p in zip(threats[threats['level'] != previous], previous[threats['level'] != previous])
+            ]
+            # Tracks that disappeared while alerting clear their alert
+            for tid, level in zip(self._tids[~still_tracked].tolist(), self._levels[~still_tracked].tolist()):
+                alerts.append(Alert(tid, NONE, level, float('nan'), float('inf'), float('nan'), timestamp))
+
+            alerting = threats[threats['level'] != NONE]
+            order = np.argsort(alerting['tid'])
+            self._tids, self._levels = alerting['tid'][order], alerting['level'][order]
+            self.threats = threats
+            self.level = int(threats['level'].max()) if len(threats) else NONE
+        return alerts
+
+    def reset(self):
+        with self._lock:
+            self._tids = np.empty(0, dtype=np.uint32)
+            self._levels = np.empty(0, dtype=np.uint8)
+            self.threats = np.empty(0, dtype=THREAT_DTYPE)
+            self.level = NONE
+
+    def _classify(self, ttc, clearance, previous):
+        h = self.hysteresis
+        warning = (ttc < self.ttc_warning) & (clearance < self.clearance_warning)
+        keep_warning = (previous == WARNING) & (ttc < self.ttc_warning * h) \
+            & (clearance < self.clearance_warning * h)
+        caution = (ttc < self.ttc_caution) & (clearance < self.clearance_caution)
+        keep_caution = (previous >= CAUTION) & (ttc < self.ttc_caution * h) \
+            & (clearance < self.clearance_caution * h)
+        return np.where(warning | keep_warning, WARNING,
+                        np.where(caution | keep_caution, CAUTION, NONE)).astype(np.uint8)
+
+
+def assess(tracks, min_closing_speed=1.0):
+    """Range, range rate, TTC and clearance of every track (THREAT_DTYPE, level unset)."""
+    n = len(tracks)
+    threats = np.zeros(n, dtype=THREAT_DTYPE)
+    threats['tid'] = tracks['tid']
+    if n == 0:
+        return threats
+
+    # Ground plane only: height does not matter for passing distance
+    px, py = tracks['pos'][:, 0].astype(np.float64), tracks['pos'][:, 1].astype(np.float64)
+    vx, vy = tracks['vel'][:, 0].astype(np.float64), tracks['vel'][:, 1].astype(np.float64)
+    ax, ay = tracks['acc'][:, 0], tracks['acc'][:, 1]
+
+    r = np.hypot(px, py)
+    inv_r = 1.0 / np.maximum(r, 1e-3)
+    p_dot_v = px * vx + py * vy
+    rdot = p_dot_v * inv_r
+    ardot = (px * ax + py * ay) * inv_r
+    speed2 = vx * vx + vy * vy
+
+    closing = rdot < -min_closing_speed
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Constant velocity
+        ttc = np.where(closing, -r / rdot, np.inf)
+        # Constant radial acceleration: smallest positive root of r + rdot t + ardot t^2 / 2;
+        # no real root means the vehicle stops closing before it reaches the bike
+        use_accel = closing & (np.abs(ardot) > 1e-3)
+        if use_accel.any():
+            disc = rdot * rdot - 2.0 * ardot * r
+            sq = np.sqrt(np.maximum(disc, 0.0))
+            t1 = (-rdot - sq) / ardot
+            t2 = (-rdot + sq) / ardot
+            root = np.minimum(np.where(t1 > 0, t1, np.inf), np.where(t2 > 0, t2, np.inf))
+            ttc = np.where(use_accel, np.where(disc >= 0, root, np.inf), ttc)
+
+        # Closest point of approach of the constant-velocity path
+        t_cpa = np.where(speed2 > 1e-6, np.maximum(-p_dot_v / speed2, 0.0), 0.0)
+    clearance = np.hypot(px + vx * t_cpa, py + vy * t_cpa)
+
+    threats['range'] = r
+    threats['range_rate'] = rdot
+    threats['ttc'] = ttc
+    threats['clearance'] = clearance
+    return threats
+
+
+def predicted_paths(tracks, horizon, step=0.2):
+    """Constant-acceleration positions of every track over ``horizon`` s.
+
+    Returns (x, y) arrays of shape (len(tracks), steps); ``horizon`` may be a
+    per-track array.
+    """
+    horizon = np.broadcast_to(np.asarray(horizon, dtype=np.float64), (len(tracks),))
+    max_h = float(horizon.max()) if len(tracks) else 0.0
+    t = np.arange(0.0, max_h + step, step)
+    # Steps beyond a track's own horizon repeat its last position
+    t = np.minimum(t[None, :], horizon[:, None])
+    p, v, a = tracks['pos'], tracks['vel'], tracks['acc']
+    x = p[:, 0, None] + v[:, 0, None] * t + 0.5 * a[:, 0, None] * t * t
+    y = p[:, 1, None] + v[:, 1, None] * t + 0.5 * a[:, 1, None] * t * t
+    return x, y
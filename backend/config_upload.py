@@ -0,0 +1,182 @@
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+
+import serial
+
+CONFIG_BAUD = 115200
+COMMAND_TIMEOUT = 1.0   # s per command; flushCfg/sensorStart answer well within this
+READ_TIMEOUT = 0.02     # s; granularity of the response wait
+STATE_FILE = ".radar_config_state.json"  # last uploaded digest per port, next to the cfg
+
+_COMMAND_RE = re.compile(r"^[A-Za-z][A-Za-z0-9_]*$")
+
+
+@dataclass(frozen=True)
+class RadarConfig:
+    """A parsed and validated radar .cfg file."""
+    path: Path
+    commands: tuple             # command lines as sent, comments stripped
+    digest: str                 # hash of the normalized command list
+    params: dict                # command name -> list of argument tuples
+
+    def get(self, name, index=-1):
+        """Arguments of the ``index``-th occurrence of command ``name``, or None."""
+        values = self.params.get(name)
+        return values[index] if values else None
+
+    @property
+    def frame_period(self):
+        """Frame periodicity in seconds, from frameCfg."""
+        args = self.get("frameCfg")
+        return args[4] / 1000.0 if args and len(args) > 4 else None
+
+
+@dataclass
+class CommandResult:
+    command: str
+    status: str                 # "done", "ignored", "error" or "timeout"
+    response: str
+    elapsed: float              # s
+
+
+@dataclass
+class UploadResult:
+    port: str
+    config: RadarConfig
+    commands: list = field(default_factory=list)
+    total_time: float = 0.0
+    skipped: bool = False       # config unchanged, only restarted the sensor
+
+    @property
+    def ok(self):
+        return all(c.status in ("done", "ignored") for c in self.commands)
+
+    @property
+    def failed(self):
+        return [c for c in self.commands if c.status not in ("done", "ignored")]
+
+
+def load_config(config_file):
+    """Parse and validate a .cfg file; cached until the file changes."""
+    path = Path(config_file).resolve()
+    st = path.stat()
+    return _load_config(path, st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=16)
+def _load_config(path, mtime_ns, size):
+    commands = []
+    params = {}
+    with path.open('r') as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('%'):
+                continue
+            name, *args = line.split()
+            if not _COMMAND_RE.match(name):
+                raise ValueError(f"{path.name}:{lineno}: invalid command '{name}'")
+            try:
+                values = tuple(float(a) for a in args)
+            except ValueError:
+                raise ValueError(f"{path.name}:{lineno}: non-numeric argument in '{line}'") from None
+            commands.append(" ".join([name, *args]))
+            params.setdefault(name, []).append(values)
+
+    if not commands:
+        raise ValueError(f"{path.name}: no commands")
+    if commands[-1].split()[0] != "sensorStart":
+        raise ValueError(f"{path.name}: last command must be sensorStart")
+
+    digest = hashlib.sha1("\n".join(commands).encode()).hexdigest()
+    return RadarConfig(path, tuple(commands), digest, params)
+
+
+def send_command(ser, command, timeout=COMMAND_TIMEOUT):
+    """Send one CLI command and wait for its Done/Error reply."""
+    start = time.perf_counter()
+    deadline = start + timeout
+    ser.write((command + '\n').encode('utf-8'))
+
+    response = bytearray()
+    status = "timeout"
+    while time.perf_counter() < deadline:
+        chunk = ser.read(max(1, ser.in_waiting))
+        if not chunk:
+            continue
+        response += chunk
+        if b'Error' in response:
+            status = "error"
+            break
+        if b'Done' in response:
+            status = "ignored" if b'Ignored' in response else "done"
+            break
+    text = response.decode('utf-8', errors='ignore').strip()
+    return CommandResult(command, status, text, time.perf_counter() - start)
+
+
+def upload_config(port, config_file, baud_rate=CONFIG_BAUD, timeout=COMMAND_TIMEOUT,
+                  skip_if_unchanged=True):
+    """Upload a .cfg to the radar CLI port, command by command, waiting for each reply.
+
+    Stops at the first command that fails. If ``skip_if_unchanged`` and this
+    exact config was the last one successfully uploaded to ``port``, the
+    sensor is only restarted with ``sensorStart 0``, falling back to a full
+    upload if that fails (e.g. the sensor was power-cycled).
+    """
+    config = load_config(config_file)
+    result = UploadResult(port, config)
+    start = time.perf_counter()
+
+    with serial.serial_for_url(port, baud_rate, timeout=READ_TIMEOUT) as ser:
+        ser.reset_input_buffer()
+
+        if skip_if_unchanged and _last_digest(config, port) == config.digest:
+            restart = [send_command(ser, "sensorStop", timeout),
+                       send_command(ser, "sensorStart 0", timeout)]
+            if all(c.status in ("done", "ignored") for c in restart):
+                result.commands = restart
+                result.skipped = True
+                result.total_time = time.perf_counter() - start
+                return result
+
+        for command in config.commands:
+            cmd_result = send_command(ser, command, timeout)
+            result.commands.append(cmd_result)
+            if cmd_result.status not in ("done", "ignored"):
+                break
+
+    result.total_time = time.perf_counter() - start
+    _store_digest(config, port, config.digest if result.ok else None)
+    return result
+
+
+def _state_path(config):
+    return config.path.with_name(STATE_FILE)
+
+
+def _last_digest(config, port):
+    try:
+        return json.loads(_state_path(config).read_text()).get(port)
+    except (OSError, ValueError):
+        return None
+
+
+def _store_digest(config, port, digest):
+    path = _state_path(config)
+    try:
+        state = json.loads(path.read_text())
+    except (OSError, ValueError):
+        state = {}
+    if digest is None:
+        state.pop(port, None)
+    else:
+        state[port] = digest
+    try:
+        path.write_text(json.dumps(state, indent=2))
+    except OSError:
+        pass
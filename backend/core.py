@@ -0,0 +1,579 @@
+"""Qt-free radar backend core.
+
+RadarCore owns decoding, binning, occupancy, recording and the acquisition
+pipeline, and reports results through plain callbacks (see ``subscribe``).
+GridBackend wraps it for the Qt frontend.
+"""
+import logging
+import struct
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import serial
+
+from backend.binning import GridBinner, CARTESIAN, POLAR
+from backend.bin_stats import MIN_CONFIDENCE, BinStatistics
+from backend.clustering import CLUSTER_DTYPE, MAX_GRID_EPS, PointClusterer
+from backend.collision import CollisionWarning, CAUTION, WARNING, LEVEL_NAMES, predicted_paths
+from backend.config_upload import CONFIG_BAUD, upload_config
+from backend.grid_stream import GridStreamServer
+from backend.metrics import Metrics, MetricsServer
+from backend.occupancy import OccupancyGrid
+from backend.pipeline import FramePipeline, BLOCK, DROP_OLDEST
+from backend.process_parser import ProcessFrameParser
+from backend.recording import FrameRecorder, ReplaySource
+from backend.session_export import SessionExporter
+from backend.sources import SerialSource
+from backend.track_history import TrackHistory
+from backend.tlv import decode_frame, decode_track_tlv
+from backend.tracing import FrameTracer, open_sink
+
+log = logging.getLogger(__name__)
+
+EVENTS = ("grid", "points", "frame", "alerts", "clusters")
+
+
+class RadarCore:
+    def __init__(self):
+        # Listeners per event: "grid" (new empty grid), "points" (GRID_POINT_DTYPE
+        # array of binned tracks), "frame" (decoded Frame), "alerts" (list of
+        # collision Alerts whose level changed) and "clusters" (CLUSTER_DTYPE
+        # array of point-cloud clusters)
+        self._listeners = {event: [] for event in EVENTS}
+
+        self.pipeline = None
+        self.running = False
+        # Sources being read, for their synchronizer counters
+        self.sources = []
+
+        # Pipeline queue sizing: raw frames are never dropped before the parser
+        # can see them unless it falls far behind; the GUI only needs recent frames
+        self.raw_queue_size = 64
+        self.frame_queue_size = 4
+        self.frame_queue_policy = DROP_OLDEST
+
+        # Number of worker processes for frame parsing; 0 parses in a thread
+        self.parse_workers = 0
+        self.process_parser = None
+
+        # Raw frame recorder (set by start_recording)
+        self.recorder = None
+
+        # Per-frame trace records (set by start_tracing)
+        self.tracer = None
+
+        # Columnar export of decoded frames (set by start_export)
+        self.exporter = None
+        
+        # Grid dimensions (set when create_grid is called)
+        self.x_min = 0
+        self.x_max = 0
+        self.y_min = 0
+        self.y_max = 0
+        self.dx = 0
+        self.dy = 0
+        self.nx = 0
+        self.ny = 0
+
+        # Binning (set when create_grid is called)
+        self.binning_mode = POLAR
+        self.binner = None
+
+        # Persistent occupancy (set when create_grid is called); keyword
+        # arguments for OccupancyGrid: decay, hit/miss weights, saturation, ...
+        self.occupancy_params = {}
+        self.occupancy = None
+
+        # Per-cell hit/dwell/speed statistics for bin inspection; unlike the
+        # occupancy map they carry over to a new grid (see backend.bin_stats)
+        self.bin_stats = BinStatistics()
+
+        # Point-cloud clustering (set when create_grid is called); keyword
+        # arguments for PointClusterer: min_points, and eps to override the
+        # grid cell size in meters. Off until a frontend that shows or records
+        # clusters turns it on (set_clustering): it costs more per frame than
+        # the rest of the publisher on dense point clouds
+        self.cluster_params = {}
+        self.clusterer = None
+        self.clustering = False
+        # Clusters of the newest published frame, for frontends that repaint at their own rate
+        self.clusters = np.empty(0, dtype=CLUSTER_DTYPE)
+
+        # Arrival time of the newest published frame, for display latency
+        self.last_frame_timestamp = 0.0
+        # Newest published Frame (point cloud, tracks), for frontends that repaint at their own rate
+        self.latest_frame = None
+
+        # Recent samples of every track ID (trails, closing speed)
+        self.track_history = TrackHistory()
+
+        # Approaching-vehicle warnings; threat_map holds the alert level of the
+        # cells threatening tracks will cross (None while nothing is alerting)
+        self.collision = CollisionWarning()
+        self._threat_paths = None           # (binner, tracks, horizon, levels) of the newest frame
+        self._threat_map_source = None
+        self._threat_map = None
+
+        self.metrics = Metrics()
+        self.metrics_server = None
+
+        # Occupancy/track stream to remote viewers (set by serve_grid_stream)
+        self.grid_stream = None
+        self._init_metrics()
+
+    def _init_metrics(self):
+        m = self.metrics
+        self._frames_received = m.counter("frames_received", "Raw frames delivered by the source")
+        self._parse_errors = m.counter("parse_errors", "Frames dropped because the header could not be read")
+        self._tlv_errors = m.counter("tlv_errors", "Frames cut short by a malformed TLV")
+        self._frames_published = m.counter("frames_published", "Frames folded into the grid and emitted")
+        self._parse_us = m.histogram("parse_us", help="Frame decode time (us)")
+        self._publish_us = m.histogram("publish_us", help="Occupancy update and listeners (us)")
+        self._latency_us = m.histogram("latency_us", help="Frame arrival to published (us)")
+        m.histogram("display_latency_us", help="Frame arrival to painted, observed by the frontend (us)")
+
+        def sync_total(attr):
+            syncs = [getattr(s, "sync", None) for s in self.sources]
+            return sum(getattr(sync, attr) for sync in syncs if sync is not None)
+
+        def queue_stat(stage, key):
+            return self.pipeline_stats().get(stage, {}).get("queue", {}).get(key, 0)
+
+        m.gauge("sync_resyncs", lambda: sync_total("resyncs"), "Magic word resynchronizations")
+        m.gauge("sync_bytes_discarded", lambda: sync_total("bytes_discarded"), "Bytes skipped while resynchronizing")
+        m.gauge("sync_bad_headers", lambda: sync_total("bad_headers"), "Rejected frame headers")
+        m.gauge("raw_queue_depth", lambda: queue_stat("parser", "depth"), "Raw frames waiting for the parser")
+        m.gauge("raw_queue_drops", lambda: queue_stat("parser", "drops"), "Raw frames dropped before parsing")
+        m.gauge("frame_queue_depth", lambda: queue_stat("publisher", "depth"), "Decoded frames waiting to be published")
+        m.gauge("frame_queue_drops", lambda: queue_stat("publisher", "drops"), "Decoded frames dropped before publishing")
+        m.gauge("stream_subscribers", lambda: len(self.grid_stream.subscribers) if self.grid_stream else 0,
+                "Remote grid stream viewers")
+        m.gauge("stream_bytes_encoded", lambda: self.grid_stream.bytes_encoded if self.grid_stream else 0,
+                "Bytes of keyframes and deltas encoded for the grid stream")
+        m.gauge("export_dropped_frames", lambda: self.exporter.dropped_frames if self.exporter else 0,
+                "Frames dropped because the session writer fell behind")
+
+    def subscribe(self, event, callback):
+        """Call ``callback(payload)`` whenever ``event`` fires (see EVENTS)."""
+        if event not in self._listeners:
+            raise ValueError(f"Unknown event: {event}")
+        self._listeners[event].append(callback)
+
+    def unsubscribe(self, event, callback):
+        self._listeners[event].remove(callback)
+
+    def _emit(self, event, payload):
+        for callback in self._listeners[event]:
+            callback(payload)
+
+    def create_grid(self, cfg):
+        """Set up the grid lattice, binner and occupancy map; returns the empty grid."""
+        try:
+            self.x_min = cfg["x_min"]
+            self.x_max = cfg["x_max"]
+            self.y_min = cfg["y_min"]
+            self.y_max = cfg["y_max"]
+            dx = cfg["dx"]
+            dy = cfg["dy"]
+
+            # Validation
+            if dx <= 0 or dy <= 0:
+                log.error("Invalid cell size")
+                return
+            if self.x_max <= self.x_min or self.y_max <= self.y_min:
+                log.error("Invalid range")
+                return
+
+            self.nx = int((self.x_max - self.x_min) / dx)
+            self.ny = int((self.y_max - self.y_min) / dy)
+
+            if self.nx <= 0 or self.ny <= 0:
+                log.error("Invalid grid size")
+                return
+
+            self.dx = dx
+            self.dy = dy
+            self.binner = GridBinner(self.x_min, self.x_max, self.y_min, self.y_max,
+                                     dx, dy, mode=self.binning_mode)
+            self.occupancy = OccupancyGrid(self.ny, self.nx, **self.occupancy_params)
+            self.bin_stats.set_grid(self.binner)
+            self.clusterer = self._make_clusterer()
+
+            # Y rows, X columns
+            grid = np.zeros((self.ny, self.nx), dtype=np.float32)
+
+            log.info(f"Grid dimensions stored: X[{self.x_min}, {self.x_max}], Y[{self.y_min}, {self.y_max}]")
+            log.info(f"Grid cells: {self.nx} x {self.ny}")
+            
+            self._emit("grid", grid)
+            return grid
+
+        except Exception as e:
+            log.error(f"Backend error: {e}")
+
+    def set_binning_mode(self, mode):
+        """Switch between CARTESIAN (x/y meters) and POLAR (azimuth/range) binning."""
+        if mode not in (CARTESIAN, POLAR):
+            log.error(f"Invalid binning mode: {mode}")
+            return
+        self.binning_mode = mode
+        if self.binner is not None:
+            self.binner = GridBinner(self.x_min, self.x_max, self.y_min, self.y_max,
+                                     self.dx, self.dy, mode=mode)
+            # Cells change meaning with the mode; start over
+            self.occupancy.reset()
+            self.bin_stats.set_grid(self.binner)
+            self.clusterer = self._make_clusterer()
+
+    def set_clustering(self, enabled):
+        """Turn point-cloud clustering of published frames on or off."""
+        self.clustering = bool(enabled)
+        if not self.clustering:
+            self.clusters = np.empty(0, dtype=CLUSTER_DTYPE)
+
+    def _make_clusterer(self):
+        """Clusterer whose hash cell (and eps) is the grid cell size in meters, up to MAX_GRID_EPS.
+
+        In POLAR mode only the range step is in meters, so it is used alone.
+        """
+        cell = min(self.dx, self.dy) if self.binning_mode == CARTESIAN else self.dy
+        return PointClusterer(**{"eps": min(cell, MAX_GRID_EPS), **self.cluster_params})
+
+    def send_config(self, config_port: str, config_file: Path, skip_if_unchanged: bool = True):
+        """Send configuration commands to the radar via the config serial port.
+
+        Returns an UploadResult with per-command status and timings, or None
+        if the config could not be read or the port opened.
+        """
+        log.info(f"Opening config port {config_port} at {CONFIG_BAUD} baud")
+        try:
+            result = upload_config(config_port, config_file, CONFIG_BAUD,
+                                   skip_if_unchanged=skip_if_unchanged)
+        except (OSError, ValueError, serial.SerialException) as e:
+            log.error(f"Error sending config: {e}")
+            return None
+
+        for cmd in result.commands:
+            log.info(f"SEND: {cmd.command} -> {cmd.status} ({cmd.elapsed * 1000:.0f} ms)")
+        if result.skipped:
+            log.info(f"Configuration unchanged; sensor restarted in {result.total_time:.2f} s")
+        elif result.ok:
+            log.info(f"Configuration sent in {result.total_time:.2f} s")
+        else:
+            failed = result.failed[0]
+            log.error(f"Configuration failed at '{failed.command}': {failed.status} {failed.response}")
+        return result
+
+    def start_reading(self, data_port: str, baud_rate: int = 921600):
+        """Start the reader -> parser -> publisher pipeline for the data port."""
+        self.start_source(SerialSource(data_port, baud_rate))
+
+    def start_replay(self, capture_file: Path, speed: float = 1.0, loop: bool = False):
+        """Feed a recorded capture through the same pipeline.
+
+        ``speed`` is a multiple of real time; 0 replays as fast as possible.
+        The capture is closed when the replay ends or the pipeline stops;
+        published Frames (``latest_frame``, pending exports) keep their
+        part of the mapping alive until they are dropped.
+        """
+        try:
+            source = ReplaySource(capture_file, speed=speed, loop=loop, close_when_done=True)
+        except (OSError, ValueError) as e:
+            log.error(f"Error opening capture: {e}")
+            return
+        if not self.start_source(source):
+            source.close()
+
+    def start_source(self, source):
+        """Start the pipeline on any data source (see backend.sources); returns whether it started."""
+        if not self._start_pipeline(source):
+            return False
+        name = source.describe() if hasattr(source, "describe") else type(source).__name__
+        log.info(f"Started radar reading pipeline on {name}")
+        return True
+
+    def _start_pipeline(self, source):
+        if self.pipeline and self.pipeline.is_running():
+            log.warning("Already reading from radar")
+            return False
+
+        self.running = True
+        self.sources = [source]
+        parse = self._decode_frame
+        if self.parse_workers > 0:
+            self.process_parser = ProcessFrameParser(self.parse_workers)
+            parse = self.process_parser
+        # A file replayed as fast as possible waits for the parser instead of dropping frames
+        lossless = getattr(source, "lossless", False)
+        self.pipeline = FramePipeline(
+            source=lambda stop: self._record_frames(source(stop)),
+            parse=parse,
+            publish=self._publish_frame,
+            raw_maxsize=self.raw_queue_size,
+            raw_policy=BLOCK if lossless else DROP_OLDEST,
+            frame_maxsize=self.frame_queue_size,
+            frame_policy=BLOCK if lossless else self.frame_queue_policy,
+        )
+        self.pipeline.start()
+        return True
+
+    def stop_reading(self):
+        """Stop all pipeline stages."""
+        self.running = False
+        if self.pipeline:
+            self.pipeline.stop(timeout=2)
+            log.info("Stopped radar reading pipeline")
+        if self.process_parser:
+            self.process_parser.close()
+            self.process_parser = None
+
+    def start_recording(self, capture_file: Path):
+        """Append every raw frame read from now on to ``capture_file``."""
+        self.stop_recording()
+        self.recorder = FrameRecorder(capture_file)
+        log.info(f"Recording raw frames to {capture_file}")
+
+    def stop_recording(self):
+        recorder, self.recorder = self.recorder, None
+        if recorder:
+            recorder.close()
+            log.info(f"Stopped recording ({recorder.frames} frames)")
+
+    def start_tracing(self, trace_file: Path, every: int = 1):
+        """Write a trace record for every ``every``-th frame (JSONL for *.jsonl, else binary)."""
+        self.stop_tracing()
+        self.tracer = FrameTracer(open_sink(trace_file), every)
+        log.info(f"Tracing every {self.tracer.every} frame(s) to {trace_file}")
+
+    def stop_tracing(self):
+        tracer, self.tracer = self.tracer, None
+        if tracer:
+            tracer.close()
+            log.info(f"Stopped tracing ({tracer.records} records)")
+
+    def start_export(self, path: Path, fmt: str = None, snapshot_interval: float = 1.0):
+        """Export decoded tracks, points and occupancy snapshots into the directory ``path``."""
+        self.stop_export()
+        self.exporter = SessionExporter(path, fmt, snapshot_interval=snapshot_interval)
+        log.info(f"Exporting session ({self.exporter.fmt}) to {path}")
+
+    def stop_export(self):
+        exporter, self.exporter = self.exporter, None
+        if exporter:
+            exporter.close()
+            log.info(f"Stopped export ({exporter.frames} frames, {exporter.dropped_frames} dropped)")
+
+    def serve_metrics(self, port: int = 9108, host: str = "127.0.0.1"):
+        """Serve the metrics over HTTP (/metrics in Prometheus text, /metrics.json)."""
+        self.stop_metrics()
+        self.metrics_server = MetricsServer(self.metrics, port, host)
+        log.info(f"Serving metrics on http://{host}:{self.metrics_server.address[1]}/metrics")
+
+    def stop_metrics(self):
+        server, self.metrics_server = self.metrics_server, None
+        if server:
+            server.close()
+
+    def serve_grid_stream(self, port: int = 9109, host: str = "127.0.0.1", levels: int = 16):
+        """Stream occupancy keyframes/deltas and tracks to remote viewers over TCP (see backend.grid_stream)."""
+        self.stop_grid_stream()
+        self.grid_stream = GridStreamServer(port, host, levels)
+        log.info(f"Streaming the grid on {host}:{self.grid_stream.address[1]}")
+
+    def stop_grid_stream(self):
+        server, self.grid_stream = self.grid_stream, None
+        if server:
+            server.close()
+
+    def _record_frames(self, frames):
+        """Pass raw frames through, appending them to the active recording (reader stage)."""
+        received = self._frames_received
+        for raw in frames:
+            received.inc()
+            recorder = self.recorder
+            if recorder is not None:
+                recorder.write(raw)
+            yield raw
+
+    def pipeline_stats(self):
+        """Per-stage frame/error counters and queue depth/drops."""
+        return self.pipeline.stats() if self.pipeline else {}
+
+    def frames(self, source, stop=None):
+        """Read, decode and publish frames from ``source`` in the calling thread.
+
+        Yields each decoded Frame; an alternative to the threaded pipeline for
+        scripts and headless tools.
+        """
+        stop = stop or threading.Event()
+        for raw in self._record_frames(source(stop)):
+            frame = self.parse_standard_frame(raw)
+            if frame is not None:
+                yield frame
+
+    def parse_standard_frame(self, frameData):
+        """Parse a complete radar frame, publish it and return it as a Frame."""
+        frame = self._decode_frame(frameData)
+        if frame is not None:
+            frame.timestamp = time.monotonic()
+            self._publish_frame(frame)
+        return frame
+
+    def _decode_frame(self, frameData):
+        """Decode one frame (parser stage)."""
+        start = time.perf_counter()
+        try:
+            frame = decode_frame(frameData)
+        except ValueError as e:
+            self._parse_errors.inc()
+            log.error(f'Could not read frame header: {e}')
+            return None
+
+        frame.parse_us = (time.perf_counter() - start) * 1e6
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(f"frameNum {frame.frame_num} numDetectedObj {frame.num_detected_obj} "
+                      f"tracks {len(frame.tracks)} points {len(frame.points)} presence {frame.presence}")
+        return frame
+
+    def _publish_frame(self, frame):
+        """Update occupancy and hand a decoded frame to the listeners (publisher stage)."""
+        start = time.perf_counter()
+
+        timestamp = frame.timestamp or time.monotonic()
+        tracks, cells = self.update_occupancy(frame)
+        self.bin_stats.update(tracks, timestamp, frame.frame_num, cells)
+        self.track_history.append(frame.tracks, timestamp)
+        self.update_threats(frame)
+        self.update_clusters(frame)
+        self.last_frame_timestamp = frame.timestamp
+        self.latest_frame = frame
+        self._emit("frame", frame)
+
+        if len(frame.tracks) > 0:
+            # Rescale and emit points
+            self.rescale_and_emit_points(frame.tracks)
+
+        emit_us = (time.perf_counter() - start) * 1e6
+        self._frames_published.inc()
+        self._parse_us.observe(frame.parse_us)
+        self._publish_us.observe(emit_us)
+        if frame.timestamp:
+            self._latency_us.observe((time.monotonic() - frame.timestamp) * 1e6)
+        if frame.tlv_error:
+            self._tlv_errors.inc()
+
+        tracer = self.tracer
+        if tracer is not None and tracer.sampled(frame.frame_num):
+            tracer.record(frame, emit_us)
+
+        exporter = self.exporter
+        if exporter is not None:
+            exporter.write(frame, self.occupancy)
+
+        stream = self.grid_stream
+        if stream is not None and self.binner is not None:
+            stream.publish(frame, self.occupancy,
+                           (self.x_min, self.x_max, self.y_min, self.y_max, self.dx, self.dy, self.binning_mode),
+                           self.collision.threats['level'])
+
+    def update_occupancy(self, frame):
+        """Fold a frame's confident tracks and point cloud into the occupancy grid.
+
+        Returns the confident tracks and their (binner, ix, iy, inside) cells
+        for ``BinStatistics.update``, or the frame's tracks and None if there
+        is no grid yet.
+        """
+        binner, occupancy = self.binner, self.occupancy
+        if binner is None or occupancy.shape != (binner.ny, binner.nx):
+            return frame.tracks, None
+
+        tracks = frame.tracks[frame.tracks['confidence'] >= MIN_CONFIDENCE]
+        tix, tiy, inside = binner.cells(tracks['pos'][:, 0], tracks['pos'][:, 1])
+        pix, piy = binner.bin_points(frame.points)
+        occupancy.update(tiy[inside], tix[inside], piy, pix)
+        return tracks, (binner, tix, tiy, inside)
+
+    def update_clusters(self, frame):
+        """Cluster the frame's point cloud into frame.clusters and emit them (if clustering is on)."""
+        clusterer = self.clusterer
+        if clusterer is None or not self.clustering:
+            return
+        frame.clusters = self.clusters = clusterer.cluster(frame.points)
+        self._emit("clusters", frame.clusters)
+
+    def update_threats(self, frame):
+        """Assess collision risk of the frame's tracks, map threatened cells and emit level changes."""
+        collision = self.collision
+        alerts = collision.update(frame.tracks, frame.timestamp)
+
+        binner, threats = self.binner, collision.threats
+        alerting = threats['level'] >= CAUTION
+        if binner is None or not alerting.any():
+            self._threat_paths = None
+        else:
+            # Paths up to each threat's TTC (capped); the map is drawn from them on demand
+            horizon = np.minimum(threats['ttc'][alerting], collision.ttc_caution)
+            self._threat_paths = (binner, frame.tracks[alerting], horizon, threats['level'][alerting])
+
+        if alerts:
+            # Listeners ("alerts") surface these; logging every rise would flood the console
+            if log.isEnabledFor(logging.DEBUG):
+                for alert in alerts:
+                    if alert.level > alert.previous:
+                        log.debug(f"Track {alert.tid} {LEVEL_NAMES[alert.level]}: range {alert.range:.1f} m, "
+                                  f"TTC {alert.ttc:.1f} s, clearance {alert.clearance:.1f} m")
+            self._emit("alerts", alerts)
+
+    @property
+    def threat_map(self):
+        """Alert level (uint8, (ny, nx)) of the cells on the threats' predicted paths, or None.
+
+        Built on the first read after each frame, so frames nobody draws do
+        not pay for it.
+        """
+        paths = self._threat_paths
+        if paths is not self._threat_map_source:
+            self._threat_map = None if paths is None else self._draw_threat_map(*paths)
+            self._threat_map_source = paths
+        return self._threat_map
+
+    @staticmethod
+    def _draw_threat_map(binner, tracks, horizon, levels):
+        x, y = predicted_paths(tracks, horizon)
+        ix, iy, inside = binner.cells(x.ravel(), y.ravel())
+        levels = np.repeat(levels, x.shape[1])[inside]
+        cells = (iy * binner.nx + ix)[inside]
+        threat_map = np.zeros((binner.ny, binner.nx), dtype=np.uint8)
+        # WARNING cells are written last so they win over CAUTION in shared cells
+        threat_map.reshape(-1)[cells[levels == CAUTION]] = CAUTION
+        threat_map.reshape(-1)[cells[levels == WARNING]] = WARNING
+        return threat_map
+
+    def parse_track_tlv(self, tlvData, tlvLength):
+        """Parse Track TLV to extract target positions."""
+        targets = decode_track_tlv(tlvData[:tlvLength])
+        return len(targets), targets
+
+    def rescale_and_emit_points(self, targets):
+        """Bin radar tracks into the grid (Cartesian or polar) and emit them for plotting."""
+        # Check if grid is set
+        binner = self.binner
+        if binner is None:
+            # Silently skip if grid not initialized (expected during startup)
+            return
+
+        # Confidence filter, binning and clamping in one vectorized pass
+        points = binner.bin_tracks(targets, min_confidence=0.5)
+        if len(points) == 0:
+            return
+
+        # Publish binned points to frontend
+        self._emit("points", points)
+
+    @staticmethod
+    def tlv_header_decode(data):
+        """Decode TLV header."""
+        tlvType, tlvLength = struct.unpack('2I', data)
+        return tlvType, tlvLength
\ No newline at end of file
@@ -0,0 +1,168 @@
+import logging
+
+from backend.tlv import MAGIC_WORD, HEADER_STRUCT, HEADER_LEN, TLV_HEADER_LEN
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CAPACITY = 1 << 16   # bytes; must hold at least one full frame
+DEFAULT_MAX_TLVS = 32
+
+
+class FrameSynchronizer:
+    """Incremental magic-word frame synchronizer over a preallocated buffer.
+
+    Bytes are written into a fixed bytearray (``write_view``/``commit`` or
+    ``feed``) and complete frames are handed out by ``next_frame`` as
+    memoryviews into that buffer. A returned view is only valid until the
+    next write; copy it if it has to outlive that.
+
+    The magic search resumes where the previous scan stopped, so each byte
+    is scanned once, and headers with implausible lengths are rejected
+    before waiting on ``totalPacketLen`` bytes that may never come.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, max_tlvs=DEFAULT_MAX_TLVS):
+        if capacity < HEADER_LEN:
+            raise ValueError(f"capacity must be at least {HEADER_LEN} bytes")
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self.capacity = capacity
+        self.max_tlvs = max_tlvs
+
+        self._start = 0     # first unconsumed byte
+        self._end = 0       # one past the last written byte
+        self._scan = 0      # magic search resumes here
+        self._frame_len = 0  # validated totalPacketLen of the frame at _start, 0 if unsynced
+
+        # Counters
+        self.frames = 0
+        self.resyncs = 0
+        self.bytes_discarded = 0
+        self.bad_headers = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def bytes_needed(self):
+        """Number of bytes still missing for the next frame (at least 1)."""
+        if self._frame_len:
+            return max(1, self._frame_len - len(self))
+        return max(1, HEADER_LEN - len(self))
+
+    def write_view(self, size):
+        """Return a writable view of up to ``size`` free bytes at the tail.
+
+        Compacts the buffer first if the tail does not have room. Call
+        ``commit`` with the number of bytes actually written.
+        """
+        if self.capacity - self._end < size:
+            self._compact()
+        size = min(size, self.capacity - self._end)
+        return self._view[self._end:self._end + size]
+
+    def commit(self, nbytes):
+        self._end += nbytes
+
+    def feed(self, data):
+        """Copy as much of ``data`` as fits into the buffer; returns the number of bytes taken.
+
+        Complete frames are never overwritten: when less than ``len(data)`` is
+        taken, read them with ``next_frame`` and feed the rest.
+        """
+        data = memoryview(data)
+        dst = self.write_view(len(data))
+        if not len(dst) and len(data):
+            # Full: a complete frame is waiting, or the bytes cannot be synced and are dropped
+            if self._frame_len or self._sync():
+                return 0
+            dst = self.write_view(len(data))
+        n = len(dst)
+        dst[:] = data[:n]
+        self.commit(n)
+        return n
+
+    def readinto(self, stream, size):
+        """Read up to ``size`` bytes from ``stream`` straight into the buffer."""
+        dst = self.write_view(size)
+        if not len(dst):
+            self._drop_oldest()
+            dst = self.write_view(size)
+        n = stream.readinto(dst) or 0
+        self.commit(n)
+        return n
+
+    def next_frame(self):
+        """Return the next complete frame as a memoryview, or None."""
+        while True:
+            if not self._frame_len:
+                if not self._sync():
+                    return None
+            if len(self) < self._frame_len:
+                return None
+
+            frame = self._view[self._start:self._start + self._frame_len]
+            self._start += self._frame_len
+            self._scan = self._start
+            self._frame_len = 0
+            self.frames += 1
+            return frame
+
+    def reset(self):
+        self._start = self._end = self._scan = 0
+        self._frame_len = 0
+
+    def _sync(self):
+        """Align _start on a frame with a sane header. Returns True once aligned."""
+        while True:
+            idx = self._buf.find(MAGIC_WORD, self._scan, self._end)
+            if idx == -1:
+                # Keep a possible partial magic word at the tail
+                keep_from = max(self._start, self._end - (len(MAGIC_WORD) - 1))
+                self._discard(keep_from - self._start)
+                self._scan = self._start
+                return False
+
+            if idx != self._start:
+                self.resyncs += 1
+                self._discard(idx - self._start)
+            if len(self) < HEADER_LEN:
+                self._scan = self._start
+                return False
+
+            _, _, totalPacketLen, _, _, _, _, numTLVs, _ = HEADER_STRUCT.unpack_from(self._buf, self._start)
+            if (totalPacketLen < HEADER_LEN + numTLVs * TLV_HEADER_LEN
+                    or totalPacketLen > self.capacity
+                    or numTLVs > self.max_tlvs):
+                log.warning(f"Rejecting frame header: totalPacketLen {totalPacketLen} numTLVs {numTLVs}")
+                self.bad_headers += 1
+                self._scan = self._start + 1
+                continue
+
+            self._frame_len = totalPacketLen
+            return True
+
+    def _discard(self, nbytes):
+        if nbytes <= 0:
+            return
+        self._start += nbytes
+        self.bytes_discarded += nbytes
+        if self._scan < self._start:
+            self._scan = self._start
+
+    def _drop_oldest(self):
+        """Buffer is full and nobody consumed it: drop the oldest half and resync."""
+        self._frame_len = 0
+        self._discard(len(self) // 2 or len(self))
+
+    def _compact(self):
+        """Move unconsumed bytes to the front of the buffer."""
+        n = len(self)
+        if self._start == 0:
+            return
+        if n:
+            src = self._view[self._start:self._end]
+            # bytearray slice assignment does not handle overlapping buffers
+            self._buf[:n] = src if n <= self._start else bytes(src)
+        self._scan -= self._start
+        self._start = 0
+        self._end = n
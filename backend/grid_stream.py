@@ -0,0 +1,396 @@
+"""Streams the occupancy grid and tracks to remote viewers over TCP.
+
+Every published frame is encoded once and the same bytes go to every
+subscriber, so the encoding cost does not grow with the number of viewers.
+A new subscriber first gets a KEYFRAME (grid geometry, the whole grid, the
+tracks); after that every frame is a DELTA holding only the cells whose
+value changed, plus the tracks.
+
+Cells are sent as occupancy probabilities quantized to ``levels`` steps
+(uint8), so the slow decay of the log-odds map does not touch every cell
+every frame. A delta lists its changed cells either as u32 indices or, when
+more than about 1 in 32 cells changed, as a zlib-compressed bitset over the
+grid, whichever is smaller; either way its size follows the number of
+changes, not ``nx * ny``.
+
+Each subscriber has its own bounded queue drained by its own sender thread.
+When a slow viewer's queue is full the frame is not queued for it; once its
+queue has drained it is sent a fresh keyframe instead of the deltas it
+missed. Other viewers and the acquisition pipeline never wait on it.
+
+Wire format, little-endian: every message is MSG_HEADER followed by
+``length`` payload bytes.
+
+KEYFRAME payload: GEOMETRY, u32 n + n bytes zlib(grid), TRACKS
+DELTA payload:    u8 encoding, u32 changed count,
+                  ENCODING_INDEX: changed x u32 cell index
+                  ENCODING_BITSET: u32 n + n bytes zlib(packbits(changed mask)),
+                  changed x u8 new value, TRACKS
+TRACKS:           u16 count + count x STREAM_TRACK_DTYPE
+"""
+import argparse
+import logging
+import socket
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from backend.binning import CARTESIAN, POLAR
+from backend.pipeline import BoundedQueue, DROP_NEWEST
+
+log = logging.getLogger(__name__)
+
+STREAM_MAGIC = b'BRGS'
+STREAM_VERSION = 1
+KEYFRAME = 1
+DELTA = 2
+
+# magic, version, type, reserved, seq, frame_num, timestamp, payload length
+MSG_HEADER = struct.Struct('<4sBBHIIdI')
+# x_min, x_max, y_min, y_max, dx, dy, mode (0 cartesian, 1 polar), levels, ny, nx
+GEOMETRY = struct.Struct('<6fBBHH')
+MODES = (CARTESIAN, POLAR)
+
+ENCODING_INDEX = 0
+ENCODING_BITSET = 1
+
+# Compact track record: position in cm, velocity in cm/s, collision alert level
+STREAM_TRACK_DTYPE = np.dtype([
+    ('tid', '<u2'),
+    ('x', '<i2'),
+    ('y', '<i2'),
+    ('vx', '<i2'),
+    ('vy', '<i2'),
+    ('level', 'u1'),
+])
+
+
+def encode_tracks(tracks, levels=None):
+    out = np.zeros(len(tracks), dtype=STREAM_TRACK_DTYPE)
+    out['tid'] = tracks['tid']
+    for name, field, axis in (('x', 'pos', 0), ('y', 'pos', 1), ('vx', 'vel', 0), ('vy', 'vel', 1)):
+        out[name] = np.clip(np.round(tracks[field][:, axis] * 100), -32768, 32767)
+    if levels is not None and len(levels) == len(tracks):
+        out['level'] = levels
+    return struct.pack('<H', len(out)) + out.tobytes()
+
+
+def quantize(probability, levels, out):
+    """Occupancy probabilities (0..1) to uint8 steps 0..levels-1, written into ``out``."""
+    np.multiply(probability, levels, out=probability)
+    np.minimum(probability, levels - 1, out=probability)
+    out[...] = probability
+    return out
+
+
+class _Subscriber:
+    def __init__(self, sock, address, queue_size):
+        self.sock = sock
+        self.address = address
+        self.queue = BoundedQueue(queue_size, DROP_NEWEST)
+        self.needs_keyframe = True
+        self.bytes_sent = 0
+        self.messages = 0
+        self.resyncs = 0
+        self.thread = threading.Thread(target=self._run, name=f"grid-stream-{address[1]}", daemon=True)
+
+    def _run(self):
+        try:
+            while True:
+                message = self.queue.get(timeout=0.5)
+                if message is None:
+                    if self.queue.closed:
+                        return
+                    continue
+                self.sock.sendall(message)
+                self.bytes_sent += len(message)
+                self.messages += 1
+        except OSError as e:
+            log.info(f"Grid stream subscriber {self.address[0]}:{self.address[1]} gone: {e}")
+        finally:
+            self.queue.close()
+            self.sock.close()
+
+
+class GridStreamServer:
+    """Accepts viewers on ``host:port`` and sends them every ``publish``ed frame."""
+
+    def __init__(self, port=9109, host="127.0.0.1", levels=16, queue_size=32, send_timeout=2.0):
+        if not 2 <= levels <= 256:
+            raise ValueError("levels must be in [2, 256]")
+        self.levels = levels
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+
+        self._server = socket.create_server((host, port))
+        self._server.settimeout(0.5)
+        self.address = self._server.getsockname()
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+
+        self._geometry = None
+        self._sent = None           # quantized grid as of the last published frame
+        self._prob = None
+        self._current = None
+        self.seq = 0
+        self.bytes_encoded = 0
+
+        self._thread = threading.Thread(target=self._accept, name="grid-stream-accept", daemon=True)
+        self._thread.start()
+
+    @property
+    def subscribers(self):
+        with self._lock:
+            return [s for s in self._subscribers if not s.queue.closed]
+
+    def stats(self):
+        subs = self.subscribers
+        return {
+            "subscribers": len(subs),
+            "seq": self.seq,
+            "bytes_encoded": self.bytes_encoded,
+            "bytes_sent": sum(s.bytes_sent for s in subs),
+            "resyncs": sum(s.resyncs for s in subs),
+        }
+
+    def _accept(self):
+        while not self._closed.is_set():
+            try:
+                sock, address = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            sock.settimeout(self.send_timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sub = _Subscriber(sock, address, self.queue_size)
+            with self._lock:
+                self._subscribers = [s for s in self._subscribers if not s.queue.closed] + [sub]
+            sub.thread.start()
+            log.info(f"Grid stream subscriber {address[0]}:{address[1]} connected")
+
+    def publish(self, frame, occupancy, geometry, track_levels=None):
+        """Encode one frame and queue it for every subscriber (publisher stage).
+
+        ``geometry`` is (x_min, x_max, y_min, y_max, dx, dy, mode) of the grid
+        ``occupancy`` covers; ``track_levels`` the collision alert level per track.
+        """
+        subs = self.subscribers
+        if occupancy is None:
+            return
+        ny, nx = occupancy.shape
+        geometry = (*geometry, self.levels, ny, nx)
+        if geometry != self._geometry:
+            # New grid: everybody starts over from a keyframe
+            self._geometry = geometry
+            self._sent = np.zeros((ny, nx), dtype=np.uint8)
+            self._current = np.zeros((ny, nx), dtype=np.uint8)
+            self._prob = np.empty((ny, nx), dtype=np.float32)
+            for sub in subs:
+                sub.needs_keyframe = True
+
+        current = quantize(occupancy.probability(self._prob), self.levels, self._current)
+        self.seq += 1
+        if not subs:
+            self._sent, self._current = current, self._sent
+            return
+
+        tracks = encode_tracks(frame.tracks, track_levels)
+        header = (frame.frame_num, frame.timestamp)
+        delta = keyframe = None
+        for sub in subs:
+            if sub.needs_keyframe:
+                if len(sub.queue):
+                    continue        # let it drain the deltas it still has first
+                if keyframe is None:
+                    keyframe = self._message(KEYFRAME, header, self._encode_keyframe(current, tracks))
+                message = keyframe
+            else:
+                if delta is None:
+                    delta = self._message(DELTA, header, self._encode_delta(current, tracks))
+                message = delta
+            if sub.queue.put(message):
+                sub.needs_keyframe = False
+            else:
+                sub.needs_keyframe = True
+                sub.resyncs += 1
+        self._sent, self._current = current, self._sent
+
+    def _message(self, kind, header, payload):
+        frame_num, timestamp = header
+        message = MSG_HEADER.pack(STREAM_MAGIC, STREAM_VERSION, kind, 0, self.seq & 0xFFFFFFFF,
+                                  frame_num & 0xFFFFFFFF, timestamp, len(payload)) + payload
+        self.bytes_encoded += len(message)
+        return message
+
+    def _encode_keyframe(self, current, tracks):
+        x_min, x_max, y_min, y_max, dx, dy, mode, levels, ny, nx = self._geometry
+        grid = zlib.compress(current.tobytes(), 1)
+        return b''.join([
+            GEOMETRY.pack(x_min, x_max, y_min, y_max, dx, dy, MODES.index(mode), levels, ny, nx),
+            struct.pack('<I', len(grid)), grid, tracks,
+        ])
+
+    def _encode_delta(self, current, tracks):
+        changed = current.ravel() != self._sent.ravel()
+        index = np.flatnonzero(changed).astype('<u4')
+        values = current.ravel()[index].tobytes()
+        parts = [struct.pack('<BI', ENCODING_INDEX, len(index)), index.tobytes()]
+        if 4 * len(index) > changed.size // 8:
+            bitset = zlib.compress(np.packbits(changed).tobytes(), 1)
+            if len(bitset) + 4 < 4 * len(index):
+                parts = [struct.pack('<BII', ENCODING_BITSET, len(index), len(bitset)), bitset]
+        return b''.join([*parts, values, tracks])
+
+    def close(self):
+        self._closed.set()
+        self._server.close()
+        self._thread.join(timeout=2)
+        for sub in self.subscribers:
+            sub.queue.close()
+            try:
+                sub.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class GridStreamClient:
+    """Connects to a GridStreamServer and keeps a local copy of its grid.
+
+    ``updates()`` yields after every message with ``grid`` (uint8 levels,
+    updated in place), ``geometry`` and ``tracks`` current.
+    """
+
+    def __init__(self, host, port, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.geometry = None        # dict of the GEOMETRY fields
+        self.grid = None
+        self.tracks = np.empty(0, dtype=STREAM_TRACK_DTYPE)
+        self.seq = 0
+        self.frame_num = 0
+        self.timestamp = 0.0
+        self.keyframes = 0
+        self.deltas = 0
+        self.bytes_received = 0
+
+    def updates(self, stop=None):
+        """Yield (kind, message size in bytes) for every message until ``stop`` is set or the server closes."""
+        stop = stop or threading.Event()
+        with socket.create_connection((self.host, self.port), timeout=self.timeout) as sock:
+            sock.settimeout(0.5)
+            reader = _Reader(sock, stop)
+            while not stop.is_set():
+                head = reader.read(MSG_HEADER.size)
+                if head is None:
+                    return
+                magic, version, kind, _, seq, frame_num, timestamp, length = MSG_HEADER.unpack(head)
+                if magic != STREAM_MAGIC or version != STREAM_VERSION:
+                    raise ValueError(f"Not a grid stream (magic {magic!r}, version {version})")
+                payload = reader.read(length)
+                if payload is None:
+                    return
+                if kind == KEYFRAME:
+                    self._apply_keyframe(payload)
+                    self.keyframes += 1
+                elif kind == DELTA and self.grid is not None:
+                    self._apply_delta(payload)
+                    self.deltas += 1
+                else:
+                    continue
+                self.seq, self.frame_num, self.timestamp = seq, frame_num, timestamp
+                self.bytes_received += MSG_HEADER.size + length
+                yield kind, MSG_HEADER.size + length
+
+    def _apply_keyframe(self, payload):
+        fields = GEOMETRY.unpack_from(payload)
+        names = ("x_min", "x_max", "y_min", "y_max", "dx", "dy", "mode", "levels", "ny", "nx")
+        self.geometry = dict(zip(names, fields))
+        self.geometry["mode"] = MODES[self.geometry["mode"]]
+        offset = GEOMETRY.size
+        (n,) = struct.unpack_from('<I', payload, offset)
+        offset += 4
+        ny, nx = self.geometry["ny"], self.geometry["nx"]
+        self.grid = np.frombuffer(zlib.decompress(payload[offset:offset + n]), dtype=np.uint8).reshape(ny, nx).copy()
+        self._read_tracks(payload, offset + n)
+
+    def _apply_delta(self, payload):
+        encoding, count = struct.unpack_from('<BI', payload)
+        offset = 5
+        flat = self.grid.reshape(-1)
+        if encoding == ENCODING_INDEX:
+            index = np.frombuffer(payload, dtype='<u4', count=count, offset=offset)
+            offset += 4 * count
+        else:
+            (n,) = struct.unpack_from('<I', payload, offset)
+            offset += 4
+            bits = np.frombuffer(zlib.decompress(payload[offset:offset + n]), dtype=np.uint8)
+            index = np.flatnonzero(np.unpackbits(bits, count=flat.size))
+            offset += n
+        flat[index] = np.frombuffer(payload, dtype=np.uint8, count=count, offset=offset)
+        self._read_tracks(payload, offset + count)
+
+    def _read_tracks(self, payload, offset):
+        (count,) = struct.unpack_from('<H', payload, offset)
+        self.tracks = np.frombuffer(payload, dtype=STREAM_TRACK_DTYPE, count=count, offset=offset + 2)
+
+    def probability(self):
+        """The grid as approximate occupancy probabilities (bin centres)."""
+        return (self.grid.astype(np.float32) + 0.5) / self.geometry["levels"]
+
+
+class _Reader:
+    """Exact-size reads from a socket with a timeout, so ``stop`` is honoured."""
+
+    def __init__(self, sock, stop):
+        self.sock = sock
+        self.stop = stop
+
+    def read(self, size):
+        buf = bytearray(size)
+        view = memoryview(buf)
+        got = 0
+        while got < size:
+            if self.stop.is_set():
+                return None
+            try:
+                n = self.sock.recv_into(view[got:])
+            except socket.timeout:
+                continue
+            if n == 0:
+                return None
+            got += n
+        return bytes(buf)
+
+
+def main(argv=None):
+    """Minimal remote logger: print one line per second of what a viewer receives."""
+    parser = argparse.ArgumentParser(description="Log a grid stream")
+    parser.add_argument("address", metavar="HOST:PORT")
+    args = parser.parse_args(argv)
+    host, port = args.address.rsplit(':', 1)
+    client = GridStreamClient(host, int(port))
+    window_start, window_bytes, window_msgs = time.monotonic(), 0, 0
+    try:
+        for kind, size in client.updates():
+            window_bytes += size
+            window_msgs += 1
+            now = time.monotonic()
+            if now - window_start >= 1.0:
+                occupied = int((client.grid >= client.geometry["levels"] // 2).sum())
+                print(f"frame {client.frame_num}: {window_msgs / (now - window_start):.1f} msg/s, "
+                      f"{window_bytes / (now - window_start) / 1024:.1f} KiB/s, {len(client.tracks)} tracks, "
+                      f"{occupied} occupied cells, {client.keyframes} keyframes")
+                window_start, window_bytes, window_msgs = now, 0, 0
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,218 @@
+"""Runtime metrics: counters, gauges and fixed-bucket histograms.
+
+Counters and histograms are sharded per thread: a thread only ever writes
+its own shard, so updates need no lock and are never lost, even when
+several pipeline threads share a metric (multi-radar). Readers sum the
+shards; a snapshot taken while a thread is mid-update may miss that one
+observation. Gauges are callables evaluated at snapshot time, so metrics
+that already exist as plain attributes (queue depth, resyncs) cost nothing
+on the hot path.
+
+``Metrics.snapshot()`` returns a plain dict; ``prometheus_text()`` renders
+the Prometheus text exposition format, served by ``MetricsServer``.
+"""
+import json
+import logging
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger(__name__)
+
+# Upper bucket bounds in microseconds, from a fast TLV decode up to a
+# backed-up GUI; everything slower lands in the +Inf bucket
+LATENCY_BUCKETS_US = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 1000000)
+
+
+class Counter:
+    """Monotonic counter."""
+
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self._shards = {}
+
+    def inc(self, n=1):
+        shard = self._shards.get(threading.get_ident())
+        if shard is None:
+            shard = self._shards.setdefault(threading.get_ident(), [0])
+        shard[0] += n
+
+    @property
+    def value(self):
+        return sum(shard[0] for shard in list(self._shards.values()))
+
+
+class Histogram:
+    """Distribution over fixed ``buckets`` (sorted upper bounds)."""
+
+    def __init__(self, name, buckets=LATENCY_BUCKETS_US, help=""):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._shards = {}
+
+    def observe(self, value):
+        shard = self._shards.get(threading.get_ident())
+        if shard is None:
+            # [count per bucket + overflow, sum]
+            shard = self._shards.setdefault(threading.get_ident(), [[0] * (len(self.buckets) + 1), 0.0])
+        shard[0][bisect_left(self.buckets, value)] += 1
+        shard[1] += value
+
+    def counts(self):
+        """Per-bucket counts (last entry: above the largest bound) and the sum."""
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        for bucket_counts, bucket_sum in list(self._shards.values()):
+            for i, c in enumerate(bucket_counts):
+                counts[i] += c
+            total += bucket_sum
+        return counts, total
+
+    def quantile(self, q, counts=None):
+        """Upper bound of the bucket holding the ``q`` quantile (inf if above all buckets)."""
+        if counts is None:
+            counts, _ = self.counts()
+        n = sum(counts)
+        if n == 0:
+            return 0.0
+        rank = q * n
+        seen = 0
+        for bound, c in zip(self.buckets, counts):
+            seen += c
+            if seen >= rank:
+                return float(bound)
+        return float('inf')
+
+    def snapshot(self):
+        counts, total = self.counts()
+        n = sum(counts)
+        return {
+            "count": n,
+            "sum": total,
+            "mean": total / n if n else 0.0,
+            "p50": self.quantile(0.5, counts),
+            "p90": self.quantile(0.9, counts),
+            "p99": self.quantile(0.99, counts),
+            "buckets": dict(zip([*map(str, self.buckets), "+Inf"], counts)),
+        }
+
+
+class Gauge:
+    """Value read from ``fn()`` at snapshot time."""
+
+    def __init__(self, name, fn, help=""):
+        self.name = name
+        self.help = help
+        self.fn = fn
+
+    @property
+    def value(self):
+        try:
+            return self.fn()
+        except Exception as e:
+            log.debug(f"Gauge {self.name} failed: {e}")
+            return 0
+
+
+class Metrics:
+    """Registry of named metrics. ``counter``/``histogram`` return the existing metric if registered."""
+
+    def __init__(self, prefix="radar"):
+        self.prefix = prefix
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name, cls, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {type(metric).__name__}")
+            return metric
+
+    def counter(self, name, help=""):
+        return self._register(name, Counter, help=help)
+
+    def histogram(self, name, buckets=LATENCY_BUCKETS_US, help=""):
+        return self._register(name, Histogram, buckets, help=help)
+
+    def gauge(self, name, fn, help=""):
+        """Register (or replace) a gauge."""
+        with self._lock:
+            gauge = self._metrics[name] = Gauge(name, fn, help)
+            return gauge
+
+    def __getitem__(self, name):
+        return self._metrics[name]
+
+    def snapshot(self):
+        """All metrics as {name: value}; histograms as dicts of count/sum/quantiles/buckets."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {m.name: m.snapshot() if isinstance(m, Histogram) else m.value for m in metrics}
+
+    def prometheus_text(self):
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for m in metrics:
+            name = f"{self.prefix}_{m.name}" if self.prefix else m.name
+            if isinstance(m, Counter):
+                name += "_total"
+            if m.help:
+                lines.append(f"# HELP {name} {m.help}")
+            if isinstance(m, Histogram):
+                lines.append(f"# TYPE {name} histogram")
+                counts, total = m.counts()
+                cumulative = 0
+                for bound, c in zip([*map(str, m.buckets), "+Inf"], counts):
+                    cumulative += c
+                    lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f"{name}_sum {total}")
+                lines.append(f"{name}_count {cumulative}")
+            else:
+                lines.append(f"# TYPE {name} {'counter' if isinstance(m, Counter) else 'gauge'}")
+                lines.append(f"{name} {m.value}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves ``/metrics`` (Prometheus text) and ``/metrics.json`` from a daemon thread."""
+
+    def __init__(self, metrics, port=9108, host="127.0.0.1"):
+        self.metrics = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path == "/metrics":
+                    body = metrics.prometheus_text().encode()
+                    content_type = "text/plain; version=0.0.4"
+                elif handler.path == "/metrics.json":
+                    body = json.dumps(metrics.snapshot(), default=str).encode()
+                    content_type = "application/json"
+                else:
+                    handler.send_error(404)
+                    return
+                handler.send_response(200)
+                handler.send_header("Content-Type", content_type)
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                log.debug(format % args)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.address = self._server.server_address
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(timeout=2)
@@ -0,0 +1,240 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from backend.config_upload import load_config
+from backend.pipeline import FramePipeline
+from backend.sources import SerialSource
+from backend.tlv import Frame, TARGET_INDEX_UNASSOCIATED
+
+log = logging.getLogger(__name__)
+
+# Track IDs (and target indices) of sensor k are offset by k * SENSOR_TID_STRIDE in fused frames
+SENSOR_TID_STRIDE = 256
+
+
+def rotation_z(angle_deg):
+    a = np.radians(angle_deg)
+    c, s = np.cos(a), np.sin(a)
+    return np.array([[c, -s, 0], [s, c, 0], [0, 0, 1]], dtype=np.float32)
+
+
+def rotation_x(angle_deg):
+    a = np.radians(angle_deg)
+    c, s = np.cos(a), np.sin(a)
+    return np.array([[1, 0, 0], [0, c, -s], [0, s, c]], dtype=np.float32)
+
+
+def sensor_to_world(height, azimuth_tilt, elevation_tilt):
+    """Rigid transform (R, t) from the sensor frame to the tracker's world frame.
+
+    Arguments are the ``sensorPosition`` cfg values: mounting height (m) and
+    azimuth/elevation tilt (deg, positive elevation tilt = facing down).
+    """
+    R = rotation_z(-azimuth_tilt) @ rotation_x(-elevation_tilt)
+    t = np.array([0, 0, height], dtype=np.float32)
+    return R, t
+
+
+def transform(xyz, R, t=None):
+    """Apply ``R @ p + t`` to every row of an (N, 3) array."""
+    out = xyz @ R.T
+    if t is not None:
+        out += t
+    return out
+
+
+@dataclass
+class RadarSensor:
+    """One radar on the bike.
+
+    ``mount`` is the sensor's pose in the common (bike) frame: x, y, z offset
+    in meters and yaw in degrees (180 for a rear-facing sensor). The sensor's
+    own height/tilt come from ``sensorPosition`` in ``config_file`` unless
+    ``sensor_position`` is given. ``source`` overrides reading ``data_port``.
+    """
+    name: str
+    data_port: str = None
+    config_port: str = None
+    config_file: Path = None
+    mount: tuple = (0.0, 0.0, 0.0, 0.0)
+    sensor_position: tuple = None
+    source: object = None
+
+    def __post_init__(self):
+        if self.sensor_position is None and self.config_file is not None:
+            self.sensor_position = load_config(self.config_file).get("sensorPosition")
+        height, az_tilt, el_tilt = self.sensor_position or (0.0, 0.0, 0.0)
+
+        x, y, z, yaw = self.mount
+        # Tracks are already in the tracker's world frame; points are in the sensor frame
+        self.R_mount = rotation_z(yaw)
+        self.t_mount = np.array([x, y, z], dtype=np.float32)
+        R_world, t_world = sensor_to_world(height, az_tilt, el_tilt)
+        self.R_points = self.R_mount @ R_world
+        self.t_points = self.R_mount @ t_world + self.t_mount
+
+    def frame_source(self):
+        return self.source if self.source is not None else SerialSource(self.data_port)
+
+    def to_common_frame(self, frame, index):
+        """Return a copy of ``frame`` with tracks and points in the bike frame.
+
+        Target indices become uint16 and are offset like the track IDs, so an
+        associated point's index is its fused track ID.
+        """
+        tracks = frame.tracks.copy()
+        tracks['tid'] += index * SENSOR_TID_STRIDE
+        tracks['pos'] = transform(tracks['pos'], self.R_mount, self.t_mount)
+        tracks['vel'] = transform(tracks['vel'], self.R_mount)
+        tracks['acc'] = transform(tracks['acc'], self.R_mount)
+
+        points = frame.points.copy()
+        if len(points):
+            xyz = np.column_stack([points['x'], points['y'], points['z']])
+            xyz = transform(xyz, self.R_points, self.t_points)
+            points['x'], points['y'], points['z'] = xyz[:, 0], xyz[:, 1], xyz[:, 2]
+
+        heights = frame.heights.copy()
+        heights['tid'] += index * SENSOR_TID_STRIDE
+        heights['max_z'] += self.t_mount[2]
+        heights['min_z'] += self.t_mount[2]
+
+        if len(frame.target_index) == len(points):
+            target_index = frame.target_index.astype(np.uint16)
+        else:
+            target_index = np.full(len(points), TARGET_INDEX_UNASSOCIATED, dtype=np.uint16)
+        target_index += index * SENSOR_TID_STRIDE
+
+        return Frame(frame_num=frame.frame_num, time_cpu_cycles=frame.time_cpu_cycles,
+                     num_detected_obj=frame.num_detected_obj, subframe_num=frame.subframe_num,
+                     tracks=tracks, points=points, target_index=target_index, heights=heights,
+                     presence=frame.presence, timestamp=frame.timestamp, num_tlvs=frame.num_tlvs,
+                     size=frame.size, parse_us=frame.parse_us, tlv_error=frame.tlv_error)
+
+
+class FrameFuser:
+    """Groups per-sensor frames by arrival time and merges each group into one Frame.
+
+    A group is emitted as soon as every sensor contributed a frame, or when a
+    sensor delivers its next frame before the others caught up (so a dead or
+    slow sensor never holds back the rest). Frames older than ``window``
+    seconds relative to the newest frame in the group are left out.
+
+    ``publish`` is called from every sensor's publisher thread but never
+    concurrently: fused frames are published one at a time, in order.
+    """
+
+    def __init__(self, num_sensors, publish, window=0.055):
+        self.num_sensors = num_sensors
+        self.publish = publish
+        self.window = window
+        self.fused = 0
+        self.stale = 0
+        self._pending = [None] * num_sensors
+        self._lock = threading.Lock()
+
+    def add(self, index, frame):
+        # Held while publishing too: the publish path (RadarCore._publish_frame)
+        # is not safe to run from several threads at once
+        with self._lock:
+            ready = []
+            if self._pending[index] is not None:
+                ready.append(self._take())
+            self._pending[index] = frame
+            if all(f is not None for f in self._pending):
+                ready.append(self._take())
+            for fused in ready:
+                if fused is not None:
+                    self.publish(fused)
+
+    def _take(self):
+        frames = [f for f in self._pending if f is not None]
+        self._pending = [None] * self.num_sensors
+        if not frames:
+            return None
+        newest = max(f.timestamp for f in frames)
+        fresh = [f for f in frames if newest - f.timestamp <= self.window]
+        self.stale += len(frames) - len(fresh)
+        self.fused += 1
+        return Frame(
+            frame_num=self.fused,
+            num_detected_obj=sum(f.num_detected_obj for f in fresh),
+            tracks=np.concatenate([f.tracks for f in fresh]),
+            points=np.concatenate([f.points for f in fresh]),
+            target_index=np.concatenate([f.target_index for f in fresh]),
+            heights=np.concatenate([f.heights for f in fresh]),
+            presence=any(bool(f.presence) for f in fresh),
+            timestamp=newest,
+            num_tlvs=sum(f.num_tlvs for f in fresh),
+            size=sum(f.size for f in fresh),
+            parse_us=sum(f.parse_us for f in fresh),
+            tlv_error=any(f.tlv_error for f in fresh),
+        )
+
+
+class MultiRadarManager:
+    """Configures and reads several radars concurrently and fuses them into one backend.
+
+    Every sensor runs its own reader/parser/publisher pipeline, so a stalled
+    sensor cannot starve the others. Each sensor's frames are moved into the
+    common bike frame, grouped by arrival time and handed to the backend's
+    publish path (occupancy grid, signals) as one fused frame. Raw frames of
+    all sensors go through the backend's recording and ``frames_received``
+    hook, as in single-sensor mode.
+    """
+
+    def __init__(self, backend, sensors, window=0.055):
+        self.backend = backend
+        self.sensors = list(sensors)
+        self.fuser = FrameFuser(len(self.sensors), backend._publish_frame, window)
+        self.pipelines = []
+
+    def configure(self, skip_if_unchanged=True):
+        """Upload every sensor's config in parallel. Returns {name: UploadResult}."""
+        to_configure = [s for s in self.sensors if s.config_port and s.config_file]
+        if not to_configure:
+            return {}
+        with ThreadPoolExecutor(max_workers=len(to_configure)) as pool:
+            futures = {
+                s.name: pool.submit(self.backend.send_config, s.config_port, s.config_file,
+                                    skip_if_unchanged)
+                for s in to_configure
+            }
+            return {name: f.result() for name, f in futures.items()}
+
+    def start(self):
+        if any(p.is_running() for p in self.pipelines):
+            log.warning("Already reading from radars")
+            return
+        self.pipelines = []
+        self.backend.sources = [sensor.frame_source() for sensor in self.sensors]
+        for index, (sensor, source) in enumerate(zip(self.sensors, self.backend.sources)):
+            pipeline = FramePipeline(
+                source=lambda stop, s=source: self.backend._record_frames(s(stop)),
+                parse=self.backend._decode_frame,
+                publish=lambda frame, i=index, s=sensor: self.fuser.add(i, s.to_common_frame(frame, i)),
+                raw_maxsize=self.backend.raw_queue_size,
+                frame_maxsize=self.backend.frame_queue_size,
+                frame_policy=self.backend.frame_queue_policy,
+                name=sensor.name,
+            )
+            pipeline.start()
+            self.pipelines.append(pipeline)
+        log.info(f"Started {len(self.pipelines)} radar pipelines: "
+                 f"{', '.join(s.name for s in self.sensors)}")
+
+    def stop(self):
+        for pipeline in self.pipelines:
+            pipeline.stop(timeout=2)
+        self.pipelines = []
+        log.info("Stopped radar pipelines")
+
+    def stats(self):
+        stats = {s.name: p.stats() for s, p in zip(self.sensors, self.pipelines)}
+        stats["fusion"] = {"fused": self.fuser.fused, "stale": self.fuser.stale}
+        return stats
@@ -0,0 +1,73 @@
+import threading
+
+import numpy as np
+
+
+class OccupancyGrid:
+    """Persistent log-odds occupancy map of shape (ny, nx), updated in place.
+
+    Every frame the map decays towards "unknown" (0), every cell takes a miss,
+    and cells hit by a track (or by point-cloud detections) take a hit. Values
+    saturate at ``[l_min, l_max]`` so an occupied cell survives a few missed
+    detections and a vacated cell clears within a handful of frames.
+    """
+
+    def __init__(self, ny, nx, hit_weight=0.85, miss_weight=0.4, point_weight=0.1,
+                 decay=0.9, l_min=-2.0, l_max=3.5, threshold=0.0):
+        self.hit_weight = hit_weight
+        self.miss_weight = miss_weight
+        self.point_weight = point_weight
+        self.decay = decay
+        self.l_min = l_min
+        self.l_max = l_max
+        self.threshold = threshold
+
+        self.log_odds = np.zeros((ny, nx), dtype=np.float32)
+        self.updates = 0
+        self._lock = threading.Lock()
+
+    @property
+    def shape(self):
+        return self.log_odds.shape
+
+    def update(self, track_iy, track_ix, point_iy=None, point_ix=None):
+        """Fold one frame of track (and optional point) cell hits into the map."""
+        with self._lock:
+            l = self.log_odds
+            l *= self.decay
+            l -= self.miss_weight
+
+            # Cells with a track get a net hit (one per cell, however many tracks)
+            l[track_iy, track_ix] += self.hit_weight + self.miss_weight
+
+            # Point-cloud density: every detection in a cell adds evidence
+            if point_iy is not None and len(point_iy):
+                np.add.at(l, (point_iy, point_ix), self.point_weight)
+
+            np.clip(l, self.l_min, self.l_max, out=l)
+            self.updates += 1
+
+    def reset(self):
+        with self._lock:
+            self.log_odds.fill(0)
+            self.updates += 1
+
+    def occupied(self, out):
+        """Write the thresholded (0/1) map into ``out`` (uint8 or bool, shape (ny, nx))."""
+        with self._lock:
+            np.greater(self.log_odds, self.threshold, out=out)
+        return out
+
+    def snapshot(self):
+        """Copy of the current log-odds map."""
+        with self._lock:
+            return self.log_odds.copy()
+
+    def probability(self, out):
+        """Write occupancy probabilities into ``out`` (float32, shape (ny, nx))."""
+        with self._lock:
+            np.negative(self.log_odds, out=out)
+        np.exp(out, out=out)
+        out += 1
+        np.reciprocal(out, out=out)
+        return out
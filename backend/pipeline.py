@@ -0,0 +1,268 @@
+import logging
+import threading
+import time
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+# Overflow policies for BoundedQueue
+DROP_OLDEST = "drop_oldest"    # evict the oldest queued item
+DROP_NEWEST = "drop_newest"    # reject the incoming item
+LATEST_ONLY = "latest_only"    # keep only the most recent item
+BLOCK = "block"                # wait for room (lossless; for sources that can wait, e.g. file replay)
+
+
+class BoundedQueue:
+    """Thread-safe bounded queue whose put() only blocks the producer under the BLOCK policy."""
+
+    def __init__(self, maxsize, policy=DROP_OLDEST):
+        if policy not in (DROP_OLDEST, DROP_NEWEST, LATEST_ONLY, BLOCK):
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        if policy == LATEST_ONLY:
+            maxsize = 1
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # Counters
+        self.puts = 0
+        self.drops = 0
+        self.high_water = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def put(self, item):
+        """Enqueue ``item``. Returns False if an item was dropped.
+
+        Under BLOCK, waits for room instead; the item is only dropped if the
+        queue is closed first.
+        """
+        with self._cond:
+            self.puts += 1
+            if self.policy == BLOCK:
+                while len(self._items) >= self.maxsize and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    self.drops += 1
+                    return False
+            dropped = False
+            if len(self._items) >= self.maxsize:
+                self.drops += 1
+                dropped = True
+                if self.policy == DROP_NEWEST:
+                    return False
+                self._items.popleft()
+            self._items.append(item)
+            if len(self._items) > self.high_water:
+                self.high_water = len(self._items)
+            self._cond.notify()
+            return not dropped
+
+    def get(self, timeout=None):
+        """Dequeue the next item, or return None on timeout or once closed and empty."""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if self._items:
+                item = self._items.popleft()
+                if self.policy == BLOCK:
+                    # Wake a producer waiting for room
+                    self._cond.notify_all()
+                return item
+            return None
+
+    def close(self):
+        """Wake all waiting consumers; further gets return None once drained."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        return {
+            "depth": len(self._items),
+            "high_water": self.high_water,
+            "puts": self.puts,
+            "drops": self.drops,
+        }
+
+
+class LatestValue:
+    """Single-slot mailbox: writers overwrite, the reader takes the newest value.
+
+    Values overwritten before anyone took them are counted in ``skipped``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = None
+        self._fresh = False
+        self.puts = 0
+        self.skipped = 0
+
+    def put(self, value):
+        with self._lock:
+            if self._fresh:
+                self.skipped += 1
+            self._value = value
+            self._fresh = True
+            self.puts += 1
+
+    def take(self):
+        """Return the newest value if it has not been taken yet, else None."""
+        with self._lock:
+            if not self._fresh:
+                return None
+            self._fresh = False
+            return self._value
+
+
+class FramePipeline:
+    """Reader -> parser -> publisher stages connected by bounded queues.
+
+    ``source(stop_event)`` is an iterator of raw frame bytes, ``parse(raw)``
+    decodes one frame and ``publish(frame)`` hands it downstream (e.g. emits
+    Qt signals). The parsed frame's ``timestamp`` is set to the reader's
+    arrival time (``time.monotonic()``).
+
+    ``parse`` may instead be an asynchronous parser such as
+    ProcessFrameParser (anything with ``submit``/``collect``/``in_flight``);
+    the parser stage then keeps several frames in flight and forwards them
+    in order. Each runs in its own daemon thread, so a slow parse or a
+    slow consumer only causes drops in its queue and never stalls the reader.
+    """
+
+    def __init__(self, source, parse, publish,
+                 raw_maxsize=64, raw_policy=DROP_OLDEST,
+                 frame_maxsize=4, frame_policy=DROP_OLDEST,
+                 name="radar"):
+        self.source = source
+        self.parse = parse
+        self.publish = publish
+        self.name = name
+        self.raw_queue = BoundedQueue(raw_maxsize, raw_policy)
+        self.frame_queue = BoundedQueue(frame_maxsize, frame_policy)
+
+        self._stop = threading.Event()
+        self._threads = []
+
+        # Per-stage counters
+        self.counters = {
+            "reader": {"frames": 0, "errors": 0},
+            "parser": {"frames": 0, "errors": 0},
+            "publisher": {"frames": 0, "errors": 0},
+        }
+
+    def is_running(self):
+        return any(t.is_alive() for t in self._threads)
+
+    def start(self):
+        if self.is_running():
+            raise RuntimeError("Pipeline already running")
+        self._stop.clear()
+        self.raw_queue = BoundedQueue(self.raw_queue.maxsize, self.raw_queue.policy)
+        self.frame_queue = BoundedQueue(self.frame_queue.maxsize, self.frame_queue.policy)
+        self._threads = [
+            threading.Thread(target=self._run_reader, name=f"{self.name}-reader", daemon=True),
+            threading.Thread(target=self._run_parser, name=f"{self.name}-parser", daemon=True),
+            threading.Thread(target=self._run_publisher, name=f"{self.name}-publisher", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self, timeout=2.0):
+        """Signal all stages to stop and join them (reader first, then downstream)."""
+        self._stop.set()
+        self.raw_queue.close()
+        self.frame_queue.close()
+        for t in self._threads:
+            t.join(timeout=timeout)
+        self._threads = []
+
+    def stats(self):
+        return {
+            "reader": dict(self.counters["reader"]),
+            "parser": dict(self.counters["parser"], queue=self.raw_queue.stats()),
+            "publisher": dict(self.counters["publisher"], queue=self.frame_queue.stats()),
+        }
+
+    # -------------------------------------------------
+    # Stage loops
+    # -------------------------------------------------
+    def _run_reader(self):
+        counters = self.counters["reader"]
+        try:
+            for raw in self.source(self._stop):
+                counters["frames"] += 1
+                self.raw_queue.put((time.monotonic(), raw))
+                if self._stop.is_set():
+                    break
+        except Exception as e:
+            counters["errors"] += 1
+            log.error(f"{self.name} reader stopped: {e}")
+        finally:
+            # Let the parser drain what is queued, then finish
+            self.raw_queue.close()
+
+    def _run_parser(self):
+        if hasattr(self.parse, "submit"):
+            return self._run_async_parser()
+
+        counters = self.counters["parser"]
+        while True:
+            item = self.raw_queue.get(timeout=0.5)
+            if item is None:
+                if self.raw_queue.closed:
+                    break
+                continue
+            arrival, raw = item
+            try:
+                frame = self.parse(raw)
+            except Exception as e:
+                counters["errors"] += 1
+                log.error(f"{self.name} parse error: {e}")
+                continue
+            if frame is not None:
+                frame.timestamp = arrival
+                counters["frames"] += 1
+                self.frame_queue.put(frame)
+        self.frame_queue.close()
+
+    def _run_async_parser(self):
+        counters = self.counters["parser"]
+        parser = self.parse
+        while True:
+            item = self.raw_queue.get(timeout=0.001 if parser.in_flight else 0.5)
+            if item is not None:
+                arrival, raw = item
+                if not parser.submit(raw, arrival):
+                    counters["errors"] += 1
+            for frame in parser.collect():
+                counters["frames"] += 1
+                self.frame_queue.put(frame)
+            if item is None and self.raw_queue.closed and not parser.in_flight:
+                break
+        self.frame_queue.close()
+
+    def _run_publisher(self):
+        counters = self.counters["publisher"]
+        while True:
+            frame = self.frame_queue.get(timeout=0.5)
+            if frame is None:
+                if self.frame_queue.closed:
+                    break
+                continue
+            try:
+                self.publish(frame)
+                counters["frames"] += 1
+            except Exception as e:
+                counters["errors"] += 1
+                log.error(f"{self.name} publish error: {e}")
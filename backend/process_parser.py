@@ -0,0 +1,253 @@
+"""Frame parsing in worker processes, exchanging data through shared memory.
+
+Raw frames are copied into fixed-size input slots of one SharedMemory block
+and decoded arrays are written back into matching output slots; only small
+(seq, slot, metadata) tuples travel through the multiprocessing queues.
+Frames come back in submission order, i.e. in frameNum order.
+
+If a worker process dies, the parser stops the others, decodes the frames
+still in flight from their input slots and decodes everything after that
+in the calling thread, so a crashed worker costs throughput, not frames.
+"""
+import logging
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from backend.frame_sync import DEFAULT_CAPACITY
+from backend.tlv import Frame, TRACK_DTYPE, POINT_DTYPE, HEIGHT_DTYPE, decode_frame
+
+log = logging.getLogger(__name__)
+
+# Decoded arrays in the order they are packed into an output slot
+_ARRAYS = (
+    ('tracks', TRACK_DTYPE),
+    ('points', POINT_DTYPE),
+    ('target_index', np.dtype(np.uint8)),
+    ('heights', HEIGHT_DTYPE),
+)
+_ALIGN = 8
+
+RESULT_TIMEOUT = 0.5          # s; wait for a free slot before checking on the workers
+WORKER_CHECK_INTERVAL = 0.5   # s; how often collect() checks on the workers
+
+
+def _packed_size(counts):
+    size = 0
+    for (_, dtype), count in zip(_ARRAYS, counts):
+        size += -(-count * dtype.itemsize // _ALIGN) * _ALIGN
+    return size
+
+
+def _decode_into(raw, out_buf, offset, out_slot_size):
+    """Decode ``raw`` and pack its arrays into ``out_buf`` at ``offset``. Returns the metadata."""
+    start = time.perf_counter()
+    frame = decode_frame(raw)
+    parse_us = (time.perf_counter() - start) * 1e6
+    arrays = [getattr(frame, name) for name, _ in _ARRAYS]
+    counts = tuple(len(a) for a in arrays)
+    if _packed_size(counts) > out_slot_size:
+        raise ValueError(f"decoded frame exceeds output slot ({out_slot_size} bytes)")
+
+    for array in arrays:
+        nbytes = array.nbytes
+        out_buf[offset:offset + nbytes] = np.ascontiguousarray(array).view(np.uint8)
+        offset += -(-nbytes // _ALIGN) * _ALIGN
+    return (frame.frame_num, frame.time_cpu_cycles, frame.num_detected_obj,
+            frame.subframe_num, frame.presence, frame.num_tlvs, frame.size, parse_us, frame.tlv_error, counts)
+
+
+def _worker(in_name, out_name, in_slot_size, out_slot_size, tasks, results):
+    in_shm = shared_memory.SharedMemory(name=in_name)
+    out_shm = shared_memory.SharedMemory(name=out_name)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            seq, slot, length = task
+            raw = in_shm.buf[slot * in_slot_size:slot * in_slot_size + length]
+            try:
+                meta = _decode_into(raw, out_shm.buf, slot * out_slot_size, out_slot_size)
+                results.put((seq, slot, meta, None))
+            except Exception as e:
+                results.put((seq, slot, None, str(e)))
+            finally:
+                raw.release()
+    finally:
+        in_shm.close()
+        out_shm.close()
+
+
+class ProcessFrameParser:
+    """Decodes frames in ``num_workers`` processes; returns Frames in submission order.
+
+    ``submit`` blocks while every slot is in flight; ``collect`` returns the
+    frames that are ready, in order. Call ``close`` to stop the workers and
+    free the shared memory. ``inline`` is set once a worker has died and
+    frames are decoded in the calling thread.
+    """
+
+    def __init__(self, num_workers=2, slot_size=DEFAULT_CAPACITY, num_slots=None):
+        self.num_workers = num_workers
+        self.slot_size = slot_size
+        # Decoded points are 4x the size of compressed ones
+        self.out_slot_size = 4 * slot_size
+        self.num_slots = num_slots or 4 * num_workers
+
+        self._in_shm = shared_memory.SharedMemory(create=True, size=self.num_slots * self.slot_size)
+        self._out_shm = shared_memory.SharedMemory(create=True, size=self.num_slots * self.out_slot_size)
+
+        ctx = mp.get_context('spawn')  # never fork a process that runs reader threads
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._workers = [
+            ctx.Process(target=_worker, daemon=True,
+                        args=(self._in_shm.name, self._out_shm.name, self.slot_size,
+                              self.out_slot_size, self._tasks, self._results))
+            for _ in range(num_workers)
+        ]
+        for w in self._workers:
+            w.start()
+
+        self._free = list(range(self.num_slots))
+        self._timestamps = {}
+        self._pending = {}        # seq -> (slot, length) of frames with the workers
+        self._last_check = time.monotonic()
+        self.inline = False
+        self._done = {}           # seq -> Frame (or None on error)
+        self._next_submit = 0
+        self._next_emit = 0
+        self.errors = 0
+        self.oversized = 0
+
+    @property
+    def in_flight(self):
+        return self._next_submit - self._next_emit
+
+    def submit(self, raw, timestamp=0.0):
+        """Queue one raw frame for decoding. Returns False if it was rejected."""
+        if len(raw) > self.slot_size:
+            self.oversized += 1
+            return False
+        while not self._free and not self.inline:
+            if not self._receive(block=True, timeout=RESULT_TIMEOUT) and not self._workers_alive():
+                self._fall_back()
+
+        seq = self._next_submit
+        self._next_submit += 1
+        if self.inline:
+            self._done[seq] = self._decode_inline(raw, timestamp)
+            return True
+
+        slot = self._free.pop()
+        start = slot * self.slot_size
+        self._in_shm.buf[start:start + len(raw)] = raw
+        self._timestamps[seq] = timestamp
+        self._pending[seq] = (slot, len(raw))
+        self._tasks.put((seq, slot, len(raw)))
+        return True
+
+    def collect(self, timeout=0.0):
+        """Return the decoded frames that are ready, in submission order."""
+        if not self.inline:
+            self._receive(block=timeout > 0, timeout=timeout)
+            now = time.monotonic()
+            if self._pending and now - self._last_check >= WORKER_CHECK_INTERVAL:
+                self._last_check = now
+                if not self._workers_alive():
+                    self._fall_back()
+        ready = []
+        while self._next_emit in self._done:
+            frame = self._done.pop(self._next_emit)
+            self._next_emit += 1
+            if frame is not None:
+                ready.append(frame)
+        return ready
+
+    def close(self):
+        if self.inline:
+            self._tasks.cancel_join_thread()
+        for _ in self._workers:
+            self._tasks.put(None)
+        for w in self._workers:
+            w.join(timeout=2)
+            if w.is_alive():
+                w.terminate()
+        self._in_shm.close()
+        self._in_shm.unlink()
+        self._out_shm.close()
+        self._out_shm.unlink()
+
+    def _workers_alive(self):
+        return all(w.is_alive() for w in self._workers)
+
+    def _fall_back(self):
+        """A worker died: stop the others and decode in-flight and future frames in this thread."""
+        codes = [w.exitcode for w in self._workers if not w.is_alive()]
+        log.error(f"Parser worker died (exit codes {codes}); decoding frames in the parser thread")
+        for w in self._workers:
+            if w.is_alive():
+                w.terminate()
+            w.join(timeout=2)
+        self.inline = True
+        # The raw frames of anything not returned are still in their input slots; the
+        # result queue is left alone, a killed worker may have left half a message in it
+        for seq, (slot, length) in sorted(self._pending.items()):
+            start = slot * self.slot_size
+            raw = bytes(self._in_shm.buf[start:start + length])
+            self._done[seq] = self._decode_inline(raw, self._timestamps.pop(seq, 0.0))
+        self._pending.clear()
+        self._free = list(range(self.num_slots))
+
+    def _decode_inline(self, raw, timestamp):
+        start = time.perf_counter()
+        try:
+            frame = decode_frame(raw)
+        except ValueError as e:
+            self.errors += 1
+            log.error(f"Parse error: {e}")
+            return None
+        frame.parse_us = (time.perf_counter() - start) * 1e6
+        frame.timestamp = timestamp
+        return frame
+
+    def _receive(self, block=False, timeout=None):
+        """Move finished results out of the output slots; returns how many arrived."""
+        received = 0
+        while True:
+            try:
+                if block:
+                    result = self._results.get(timeout=timeout)
+                    block = False
+                else:
+                    result = self._results.get_nowait()
+            except queue.Empty:
+                return received
+            received += 1
+            seq, slot, meta, error = result
+            if error is not None:
+                self.errors += 1
+                log.error(f"Worker parse error: {error}")
+                self._done[seq] = None
+            else:
+                self._done[seq] = self._unpack(slot, meta, self._timestamps.get(seq, 0.0))
+            self._timestamps.pop(seq, None)
+            self._pending.pop(seq, None)
+            self._free.append(slot)
+
+    def _unpack(self, slot, meta, timestamp):
+        frame_num, cycles, num_obj, subframe, presence, num_tlvs, size, parse_us, tlv_error, counts = meta
+        frame = Frame(frame_num=frame_num, time_cpu_cycles=cycles, num_detected_obj=num_obj,
+                      subframe_num=subframe, presence=presence, timestamp=timestamp,
+                      num_tlvs=num_tlvs, size=size, parse_us=parse_us, tlv_error=tlv_error)
+        offset = slot * self.out_slot_size
+        for (name, dtype), count in zip(_ARRAYS, counts):
+            # Copy out so the slot can be reused right away
+            array = np.frombuffer(self._out_shm.buf, dtype=dtype, count=count, offset=offset).copy()
+            setattr(frame, name, array)
+            offset += -(-count * dtype.itemsize // _ALIGN) * _ALIGN
+        return frame
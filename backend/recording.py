@@ -0,0 +1,160 @@
+import mmap
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend.sources import DataSource
+
+# Capture layout: <name>.bin holds FILE_MAGIC followed by raw frames back to
+# back; <name>.bin.idx holds one INDEX_DTYPE record per frame.
+FILE_MAGIC = b'BRADAR01'
+INDEX_SUFFIX = '.idx'
+INDEX_DTYPE = np.dtype([
+    ('offset', '<u8'),      # byte offset of the frame in the data file
+    ('length', '<u4'),      # frame length in bytes
+    ('timestamp', '<f8'),   # reception time (s since epoch)
+])
+
+
+def index_path(path):
+    path = Path(path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def read_index(path):
+    """Return the frame index of a capture as an INDEX_DTYPE array."""
+    return np.fromfile(index_path(path), dtype=INDEX_DTYPE)
+
+
+class FrameRecorder:
+    """Appends raw frames to a binary capture plus a frame offset/timestamp index."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        self._data = self.path.open('ab')
+        self._index = index_path(self.path).open('ab')
+        if new_file:
+            self._data.write(FILE_MAGIC)
+        self._offset = self._data.tell()
+        self._entry = np.zeros(1, dtype=INDEX_DTYPE)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.frames = 0
+
+    def write(self, frame, timestamp=None):
+        """Append one raw frame (bytes-like); frames written after ``close`` are ignored."""
+        with self._lock:
+            if self._closed:
+                return
+            length = len(frame)
+            self._data.write(frame)
+            self._entry['offset'] = self._offset
+            self._entry['length'] = length
+            self._entry['timestamp'] = time.time() if timestamp is None else timestamp
+            self._index.write(self._entry.tobytes())
+            self._offset += length
+            self.frames += 1
+
+    def flush(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._data.flush()
+            self._index.flush()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._data.close()
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ReplaySource(DataSource):
+    """Replays a capture as zero-copy memoryviews into an mmap of the data file.
+
+    ``speed`` is a multiple of real time (1.0 = as recorded, 10.0 = 10x);
+    0 replays as fast as possible. Calling the source with a stop event
+    makes it usable as a FramePipeline source; with ``close_when_done`` the
+    capture is closed as soon as ``frames`` ends or is stopped.
+
+    Yielded views (and Frames decoded from them, whose arrays are views
+    too) keep the mapping alive: ``close`` releases the file right away,
+    but the mapping itself is only unmapped once the last of them is gone.
+    Copy a frame (``bytes(view)``) to keep it independent of the capture.
+
+    At speed 0 the source is ``lossless``: the pipeline waits for the
+    parser instead of dropping frames, so every frame is decoded.
+    """
+
+    def __init__(self, path, speed=1.0, loop=False, close_when_done=False):
+        self.path = Path(path)
+        self.speed = speed
+        self.loop = loop
+        self.close_when_done = close_when_done
+        self.index = read_index(self.path)
+
+        self._file = self.path.open('rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(FILE_MAGIC)] != FILE_MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a radar capture")
+        self._view = memoryview(self._mmap)
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def lossless(self):
+        return self.speed == 0
+
+    def describe(self):
+        return f"replay {self.path} (speed {self.speed or 'max'})"
+
+    def frame(self, i):
+        """Return frame ``i`` as a memoryview."""
+        offset, length = int(self.index['offset'][i]), int(self.index['length'][i])
+        return self._view[offset:offset + length]
+
+    def frames(self, stop=None):
+        """Yield frames, paced by the recorded timestamps unless speed is 0."""
+        stop = stop or threading.Event()
+        try:
+            yield from self._frames(stop)
+        finally:
+            if self.close_when_done:
+                self.close()
+
+    def _frames(self, stop):
+        timestamps = self.index['timestamp']
+        while True:
+            t0_wall = time.perf_counter()
+            t0_rec = timestamps[0] if len(timestamps) else 0.0
+            for i in range(len(self.index)):
+                if stop.is_set():
+                    return
+                if self.speed > 0:
+                    delay = t0_wall + (timestamps[i] - t0_rec) / self.speed - time.perf_counter()
+                    if delay > 0 and stop.wait(delay):
+                        return
+                yield self.frame(i)
+            if not self.loop or not len(self.index):
+                return
+
+    def close(self):
+        if hasattr(self, '_view'):
+            self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Frames still reference the mapping; it is unmapped with the last of them
+            pass
+        self._file.close()
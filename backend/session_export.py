@@ -0,0 +1,276 @@
+"""Columnar export of decoded ride sessions for offline analysis.
+
+A session directory holds four tables:
+
+- ``frames``: one row per frame (frame_num, timestamp, presence, counts);
+- ``tracks``: one row per track per frame (TLV 1010 columns, flattened);
+- ``points``: one row per detection (TLV 1020 columns + associated track ID);
+- ``occupancy``: periodic log-odds snapshots of the occupancy grid.
+
+With pyarrow installed each table is one Parquet file (``tracks.parquet``,
+...), appended a row group per batch; when the occupancy grid changes size
+a new part (``occupancy-000001.parquet``, ...) is started. Without pyarrow
+every batch is written as a compressed NPZ chunk (``tracks-000001.npz``,
+...). ``load_session`` reads either layout back into dicts of NumPy columns.
+
+The publisher thread only collects references to each frame's arrays; a
+background thread builds the columns and writes them, so acquisition never
+waits on the disk.
+"""
+import logging
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend.pipeline import BoundedQueue, DROP_NEWEST
+from backend.tlv import TARGET_INDEX_UNASSOCIATED
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: fall back to NPZ chunks
+    pa = pq = None
+
+log = logging.getLogger(__name__)
+
+PARQUET = "parquet"
+NPZ = "npz"
+TABLES = ("frames", "tracks", "points", "occupancy")
+
+
+def default_format():
+    return PARQUET if pa is not None else NPZ
+
+
+class SessionExporter:
+    """Streams frames and occupancy snapshots into a session directory.
+
+    ``write`` is cheap and never blocks: frames are batched in memory and
+    every ``batch_frames`` frames the batch is queued for the writer thread.
+    If the writer falls ``max_pending`` batches behind, further batches are
+    dropped and counted in ``dropped_frames``, as are frames written after
+    ``close``.
+    """
+
+    def __init__(self, path, fmt=None, batch_frames=256, snapshot_interval=1.0, max_pending=16):
+        fmt = fmt or default_format()
+        if fmt not in (PARQUET, NPZ):
+            raise ValueError(f"Unknown export format: {fmt}")
+        if fmt == PARQUET and pa is None:
+            raise ValueError("Parquet export requires pyarrow")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.fmt = fmt
+        self.batch_frames = batch_frames
+        self.snapshot_interval = snapshot_interval
+
+        self._frames = []
+        self._snapshots = []
+        self._lock = threading.Lock()   # publisher thread vs. close() from the GUI
+        self._closed = False
+        self._last_snapshot = -np.inf
+        self._queue = BoundedQueue(max_pending, DROP_NEWEST)
+        self._writers = {}          # Parquet writer per table
+        self._chunks = dict.fromkeys(TABLES, 0)
+
+        self.frames = 0
+        self.dropped_frames = 0
+        self.batches_written = 0
+        self.rows_written = dict.fromkeys(TABLES, 0)
+
+        self._thread = threading.Thread(target=self._run, name="session-export", daemon=True)
+        self._thread.start()
+
+    def write(self, frame, occupancy=None):
+        """Add one decoded frame; snapshots ``occupancy`` every ``snapshot_interval`` s."""
+        timestamp = frame.timestamp or time.monotonic()
+        with self._lock:
+            if self._closed:
+                self.dropped_frames += 1
+                return
+            self._frames.append((frame.frame_num, timestamp, frame.presence,
+                                 frame.tracks, frame.points, frame.target_index))
+            if occupancy is not None and timestamp - self._last_snapshot >= self.snapshot_interval:
+                self._last_snapshot = timestamp
+                self._snapshots.append((frame.frame_num, timestamp, occupancy.snapshot()))
+            self.frames += 1
+            if len(self._frames) >= self.batch_frames:
+                self._queue_batch()
+
+    def flush(self):
+        """Queue the frames collected so far for writing."""
+        with self._lock:
+            self._queue_batch()
+
+    def _queue_batch(self):
+        # Called with the lock held, so no batch can be queued after close()
+        if not self._frames and not self._snapshots:
+            return
+        batch = (self._frames, self._snapshots)
+        self._frames, self._snapshots = [], []
+        if not self._queue.put(batch):
+            self.dropped_frames += len(batch[0])
+            log.warning(f"Session export falling behind; dropped {len(batch[0])} frames")
+
+    def close(self):
+        """Write everything still pending and close the files."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue_batch()
+            self._queue.close()
+        self._thread.join()
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -------------------------------------------------
+    # Writer thread
+    # -------------------------------------------------
+    def _run(self):
+        while True:
+            batch = self._queue.get(timeout=0.5)
+            if batch is None:
+                if self._queue.closed:
+                    return
+                continue
+            try:
+                for table, columns in build_columns(*batch).items():
+                    if columns:
+                        self._write_table(table, columns)
+                self.batches_written += 1
+            except Exception as e:
+                log.error(f"Session export error: {e}")
+
+    def _write_table(self, table, columns):
+        rows = len(next(iter(columns.values())))
+        if self.fmt == PARQUET:
+            arrow = pa.table({name: _to_arrow(values) for name, values in columns.items()})
+            writer = self._writers.get(table)
+            if writer is not None and not writer.schema.equals(arrow.schema):
+                # The grid changed size (occupancy rows are fixed-size lists): start a new part file
+                writer.close()
+                writer = None
+                self._chunks[table] += 1
+            if writer is None:
+                part = self._chunks[table]
+                name = f"{table}.parquet" if part == 0 else f"{table}-{part:06d}.parquet"
+                writer = self._writers[table] = pq.ParquetWriter(self.path / name, arrow.schema,
+                                                                 compression="zstd")
+            writer.write_table(arrow)
+        else:
+            self._chunks[table] += 1
+            np.savez_compressed(self.path / f"{table}-{self._chunks[table]:06d}.npz", **columns)
+        self.rows_written[table] += rows
+
+
+def _to_arrow(values):
+    if values.ndim == 2:
+        # Occupancy snapshot rows: one list of cells per snapshot
+        flat = pa.array(values.reshape(-1))
+        return pa.FixedSizeListArray.from_arrays(flat, values.shape[1])
+    return pa.array(values)
+
+
+def build_columns(frames, snapshots):
+    """Turn a batch of (frame_num, timestamp, presence, tracks, points, target_index)
+    tuples and occupancy snapshots into {table: {column: array}}."""
+    out = dict.fromkeys(TABLES)
+    if frames:
+        frame_num = np.array([f[0] for f in frames], dtype=np.uint32)
+        timestamp = np.array([f[1] for f in frames], dtype=np.float64)
+        n_tracks = np.array([len(f[3]) for f in frames], dtype=np.int64)
+        n_points = np.array([len(f[4]) for f in frames], dtype=np.int64)
+        out["frames"] = {
+            "frame_num": frame_num,
+            "timestamp": timestamp,
+            "presence": np.array([-1 if f[2] is None else int(f[2]) for f in frames], dtype=np.int8),
+            "num_tracks": n_tracks.astype(np.uint16),
+            "num_points": n_points.astype(np.uint16),
+        }
+
+        tracks = np.concatenate([f[3] for f in frames])
+        out["tracks"] = {
+            "frame_num": np.repeat(frame_num, n_tracks),
+            "timestamp": np.repeat(timestamp, n_tracks),
+            "tid": tracks['tid'],
+            **{f"{name}{axis}": tracks[name][:, i]
+               for name in ("pos", "vel", "acc") for i, axis in enumerate("xyz")},
+            "g": tracks['g'],
+            "confidence": tracks['confidence'],
+        } if len(tracks) else None
+
+        points = np.concatenate([f[4] for f in frames])
+        if len(points):
+            # TLV 1011 associates each point of the frame with a track (or none)
+            target = np.concatenate([
+                f[5] if len(f[5]) == len(f[4]) else np.full(len(f[4]), TARGET_INDEX_UNASSOCIATED, np.uint8)
+                for f in frames
+            ])
+            out["points"] = {
+                "frame_num": np.repeat(frame_num, n_points),
+                "timestamp": np.repeat(timestamp, n_points),
+                **{name: points[name] for name in points.dtype.names},
+                "target": target,
+            }
+
+    # Snapshots of one grid shape per table chunk; a shape change starts a new chunk
+    if snapshots:
+        shape = snapshots[-1][2].shape
+        same = [s for s in snapshots if s[2].shape == shape]
+        if len(same) < len(snapshots):
+            log.warning("Occupancy grid changed shape during a batch; older snapshots dropped")
+        out["occupancy"] = {
+            "frame_num": np.array([s[0] for s in same], dtype=np.uint32),
+            "timestamp": np.array([s[1] for s in same], dtype=np.float64),
+            "ny": np.full(len(same), shape[0], dtype=np.uint16),
+            "nx": np.full(len(same), shape[1], dtype=np.uint16),
+            "log_odds": np.stack([s[2].reshape(-1) for s in same]),
+        }
+    return out
+
+
+def load_session(path):
+    """Read a session directory back as {table: {column: array}} (either format)."""
+    path = Path(path)
+    session = {}
+    for table in TABLES:
+        parquet = [p for p in (path / f"{table}.parquet", *sorted(path.glob(f"{table}-*.parquet"))) if p.exists()]
+        if parquet:
+            if pq is None:
+                raise ValueError(f"Reading {parquet[0]} requires pyarrow")
+            parts = [_read_parquet(p) for p in parquet]
+        else:
+            parts = []
+            for chunk in sorted(path.glob(f"{table}-*.npz")):
+                with np.load(chunk) as data:
+                    parts.append({name: data[name] for name in data.files})
+        if not parts:
+            continue
+        if table == "occupancy":
+            # Parts of different grid shapes cannot be stacked; keep the latest shape
+            width = parts[-1]["log_odds"].shape[1]
+            parts = [p for p in parts if p["log_odds"].shape[1] == width]
+        session[table] = {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+    return session
+
+
+def _read_parquet(path):
+    arrow = pq.read_table(path)
+    columns = {}
+    for name in arrow.column_names:
+        column = arrow.column(name).combine_chunks()
+        if pa.types.is_fixed_size_list(column.type):
+            columns[name] = column.flatten().to_numpy().reshape(len(column), column.type.list_size)
+        else:
+            columns[name] = column.to_numpy(zero_copy_only=False)
+    return columns
@@ -0,0 +1,169 @@
+"""Synthetic radar that produces valid UART frames (header + TLVs 1010/1011/1012/1020/1021).
+
+Run as a virtual radar on a TCP port (read it with SocketSource):
+    python -m backend.simulator --port 5000 --targets 20
+"""
+import argparse
+import logging
+import socket
+import struct
+import time
+
+import numpy as np
+
+from backend.tlv import (
+    MAGIC_WORD, HEADER_STRUCT, HEADER_LEN, TLV_HEADER_STRUCT,
+    TRACK_DTYPE, HEIGHT_DTYPE, POINT_UNIT_DTYPE, COMPRESSED_POINT_DTYPE,
+    TLV_TRACKS, TLV_TARGET_INDEX, TLV_TRACK_HEIGHT, TLV_POINT_CLOUD, TLV_PRESENCE, FRAME_PERIOD,
+)
+
+log = logging.getLogger(__name__)
+
+MAGIC = int.from_bytes(MAGIC_WORD, 'little')
+VERSION = 0x03060000
+PLATFORM = 0xA6843
+
+# Quantization of the compressed point cloud (elevation, azimuth, doppler, range, snr)
+DEFAULT_UNITS = (0.01, 0.01, 0.01, 0.0025, 0.04)
+
+
+def encode_frame(frame_num, tlvs, num_detected_obj=0):
+    """Build one UART frame from a list of (tlv_type, payload bytes)."""
+    body = b''.join(TLV_HEADER_STRUCT.pack(t, len(p)) + p for t, p in tlvs)
+    header = HEADER_STRUCT.pack(MAGIC, VERSION, HEADER_LEN + len(body), PLATFORM,
+                                frame_num, 0, num_detected_obj, len(tlvs), 0)
+    return header + body
+
+
+def encode_point_cloud(xyz, doppler, snr, units=DEFAULT_UNITS):
+    """Quantize Cartesian points into a CompressedSphericalPointCloudTLV payload."""
+    unit = np.array([tuple(units)], dtype=POINT_UNIT_DTYPE)
+    rng = np.linalg.norm(xyz, axis=1)
+    az = np.arctan2(xyz[:, 0], xyz[:, 1])
+    el = np.arcsin(np.divide(xyz[:, 2], rng, out=np.zeros_like(rng), where=rng > 0))
+
+    raw = np.empty(len(xyz), dtype=COMPRESSED_POINT_DTYPE)
+    raw['elevation'] = np.clip(np.rint(el / units[0]), -128, 127)
+    raw['azimuth'] = np.clip(np.rint(az / units[1]), -128, 127)
+    raw['doppler'] = np.clip(np.rint(doppler / units[2]), -32768, 32767)
+    raw['range'] = np.clip(np.rint(rng / units[3]), 0, 65535)
+    raw['snr'] = np.clip(np.rint(snr / units[4]), 0, 65535)
+    return unit.tobytes() + raw.tobytes()
+
+
+class RadarSimulator:
+    """Constant-velocity targets in a rectangular area, encoded as radar frames.
+
+    Targets that leave the area re-enter at the far edge. ``noise`` is the
+    standard deviation (m) of reported track positions and of the point
+    cloud around each target.
+    """
+
+    def __init__(self, num_targets=5, frame_period=FRAME_PERIOD, points_per_target=8,
+                 noise=0.05, x_range=(-6.0, 6.0), y_range=(1.0, 60.0), seed=None):
+        if not 0 <= num_targets <= 250:
+            raise ValueError("num_targets must be in [0, 250]")  # IDs >= 253 are reserved
+        self.num_targets = num_targets
+        self.frame_period = frame_period
+        self.points_per_target = points_per_target
+        self.noise = noise
+        self.x_range = x_range
+        self.y_range = y_range
+        self.rng = np.random.default_rng(seed)
+        self.frame_num = 0
+
+        n = num_targets
+        self.tids = np.arange(n, dtype=np.uint32)
+        self.pos = np.column_stack([
+            self.rng.uniform(*x_range, n),
+            self.rng.uniform(*y_range, n),
+            self.rng.uniform(0.5, 1.5, n),
+        ]).astype(np.float32)
+        self.vel = np.column_stack([
+            self.rng.normal(0, 0.3, n),
+            -self.rng.uniform(2, 15, n),   # approaching from behind
+            np.zeros(n),
+        ]).astype(np.float32)
+
+    def step(self):
+        """Advance targets by one frame period."""
+        self.pos += self.vel * self.frame_period
+        gone = (self.pos[:, 1] < self.y_range[0]) | (self.pos[:, 0] < self.x_range[0]) \
+            | (self.pos[:, 0] > self.x_range[1])
+        if gone.any():
+            self.pos[gone, 0] = self.rng.uniform(*self.x_range, gone.sum())
+            self.pos[gone, 1] = self.y_range[1]
+
+    def make_frame(self):
+        """Advance one step and return the encoded frame bytes."""
+        self.step()
+        self.frame_num += 1
+        n, rng = self.num_targets, self.rng
+
+        tracks = np.zeros(n, dtype=TRACK_DTYPE)
+        tracks['tid'] = self.tids
+        tracks['pos'] = self.pos + rng.normal(0, self.noise, (n, 3))
+        tracks['vel'] = self.vel
+        tracks['ec'] = np.eye(4, dtype=np.float32) * self.noise ** 2
+        tracks['g'] = 1.0
+        tracks['confidence'] = rng.uniform(0.6, 1.0, n)
+
+        heights = np.zeros(n, dtype=HEIGHT_DTYPE)
+        heights['tid'] = self.tids
+        heights['max_z'] = self.pos[:, 2] + 0.8
+        heights['min_z'] = np.maximum(self.pos[:, 2] - 0.8, 0)
+
+        p = self.points_per_target
+        xyz = np.repeat(self.pos, p, axis=0) + rng.normal(0, max(self.noise, 0.1), (n * p, 3))
+        rng_m = np.linalg.norm(xyz, axis=1, keepdims=True)
+        doppler = np.sum(np.repeat(self.vel, p, axis=0) * xyz / np.maximum(rng_m, 1e-6), axis=1)
+        snr = rng.uniform(5, 40, n * p)
+        target_index = np.repeat(self.tids, p).astype(np.uint8)
+
+        tlvs = [
+            (TLV_POINT_CLOUD, encode_point_cloud(xyz, doppler, snr)),
+            (TLV_TRACKS, tracks.tobytes()),
+            (TLV_TARGET_INDEX, target_index.tobytes()),
+            (TLV_TRACK_HEIGHT, heights.tobytes()),
+            (TLV_PRESENCE, struct.pack('<I', int(n > 0))),
+        ]
+        return encode_frame(self.frame_num, tlvs, num_detected_obj=n * p)
+
+
+def serve_tcp(simulator, host='127.0.0.1', port=5000, speed=1.0):
+    """Stream simulator frames to one TCP client at a time, like a radar UART bridge."""
+    with socket.create_server((host, port)) as server:
+        log.info(f"Virtual radar listening on {host}:{port}")
+        while True:
+            conn, addr = server.accept()
+            log.info(f"Client connected: {addr}")
+            with conn:
+                next_t = time.perf_counter()
+                try:
+                    while True:
+                        conn.sendall(simulator.make_frame())
+                        if speed > 0:
+                            next_t += simulator.frame_period / speed
+                            time.sleep(max(0.0, next_t - time.perf_counter()))
+                except OSError:
+                    log.info(f"Client disconnected: {addr}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--targets', type=int, default=5)
+    parser.add_argument('--points', type=int, default=8, help='points per target')
+    parser.add_argument('--period', type=float, default=FRAME_PERIOD, help='frame period (s)')
+    parser.add_argument('--noise', type=float, default=0.05)
+    parser.add_argument('--speed', type=float, default=1.0, help='0 streams as fast as possible')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+
+    simulator = RadarSimulator(args.targets, args.period, args.points, args.noise)
+    serve_tcp(simulator, args.host, args.port, args.speed)
+
+
+if __name__ == "__main__":
+    main()
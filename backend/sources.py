@@ -0,0 +1,148 @@
+"""Raw frame sources for RadarCore/GridBackend.
+
+A data source is any callable ``source(stop_event)`` that returns an
+iterator of raw frames (bytes-like, header included) and finishes once
+``stop_event`` is set or the data runs out. ReplaySource in
+backend.recording follows the same interface.
+"""
+import abc
+import logging
+import socket
+import threading
+import time
+
+import serial
+
+from backend.frame_sync import FrameSynchronizer
+
+log = logging.getLogger(__name__)
+
+READ_TIMEOUT = 0.1  # s; bounds how long a stop request waits on an idle link
+
+
+class DataSource(abc.ABC):
+    """Base class for frame sources.
+
+    ``lossless`` sources can wait for the pipeline (e.g. a file replayed as
+    fast as possible); their frames are queued without dropping any.
+    """
+
+    lossless = False
+
+    def __call__(self, stop=None):
+        return self.frames(stop or threading.Event())
+
+    @abc.abstractmethod
+    def frames(self, stop):
+        """Yield raw frames until ``stop`` is set or the data runs out."""
+
+    def describe(self):
+        return type(self).__name__
+
+
+class SerialSource(DataSource):
+    """Frames from a radar UART data port (any pyserial port name or URL)."""
+
+    def __init__(self, port, baud_rate=921600, timeout=READ_TIMEOUT):
+        self.port = port
+        self.baud_rate = baud_rate
+        self.timeout = timeout
+        self.sync = None    # FrameSynchronizer of the current read, for its counters
+
+    def describe(self):
+        return f"serial {self.port} @ {self.baud_rate}"
+
+    def frames(self, stop):
+        sync = self.sync = FrameSynchronizer()
+        try:
+            with serial.serial_for_url(self.port, self.baud_rate, timeout=self.timeout) as ser:
+                while not stop.is_set():
+                    # Block until the current frame is complete (or more is already buffered)
+                    if sync.readinto(ser, max(sync.bytes_needed(), ser.in_waiting)) == 0:
+                        continue
+
+                    while (frame_view := sync.next_frame()) is not None:
+                        # Copy once so the frame can cross threads and outlive the buffer
+                        yield bytes(frame_view)
+        except serial.SerialException as e:
+            log.error(f"Error reading from serial port: {e}")
+
+
+class SocketSource(DataSource):
+    """Frames from a TCP stream or UDP datagrams (e.g. a UART-to-network bridge).
+
+    For TCP ``host``/``port`` is the server to connect to; for UDP it is the
+    local address to bind. Datagrams are treated as a byte stream, so frames
+    may span several datagrams.
+    """
+
+    def __init__(self, host, port, protocol="tcp", timeout=READ_TIMEOUT, chunk_size=8192):
+        if protocol not in ("tcp", "udp"):
+            raise ValueError(f"Unknown protocol: {protocol}")
+        self.host = host
+        self.port = port
+        self.protocol = protocol
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.sync = None
+
+    def describe(self):
+        return f"{self.protocol} {self.host}:{self.port}"
+
+    def _open(self):
+        if self.protocol == "tcp":
+            sock = socket.create_connection((self.host, self.port), timeout=5)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind((self.host, self.port))
+        sock.settimeout(self.timeout)
+        return sock
+
+    def frames(self, stop):
+        sync = self.sync = FrameSynchronizer()
+        try:
+            with self._open() as sock:
+                while not stop.is_set():
+                    try:
+                        n = sock.recv_into(sync.write_view(self.chunk_size))
+                    except socket.timeout:
+                        continue
+                    if n == 0 and self.protocol == "tcp":
+                        log.info(f"Connection closed by {self.host}:{self.port}")
+                        return
+                    sync.commit(n)
+
+                    while (frame_view := sync.next_frame()) is not None:
+                        yield bytes(frame_view)
+        except OSError as e:
+            log.error(f"Error reading from socket: {e}")
+
+
+class SyntheticSource(DataSource):
+    """Frames generated in-process by a RadarSimulator.
+
+    ``speed`` is a multiple of the simulator's frame rate; 0 generates as
+    fast as possible. ``max_frames`` limits the run (None = unlimited).
+    """
+
+    def __init__(self, simulator, speed=1.0, max_frames=None):
+        self.simulator = simulator
+        self.speed = speed
+        self.max_frames = max_frames
+
+    def describe(self):
+        return f"simulator ({self.simulator.num_targets} targets)"
+
+    def frames(self, stop):
+        count = 0
+        next_t = time.perf_counter()
+        while not stop.is_set():
+            if self.max_frames is not None and count >= self.max_frames:
+                return
+            yield self.simulator.make_frame()
+            count += 1
+            if self.speed > 0:
+                next_t += self.simulator.frame_period / self.speed
+                delay = next_t - time.perf_counter()
+                if delay > 0 and stop.wait(delay):
+                    return
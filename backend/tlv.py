@@ -0,0 +1,215 @@
+import logging
+import struct
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from backend.clustering import CLUSTER_DTYPE
+
+MAGIC_WORD = bytes([0x02, 0x01, 0x04, 0x03, 0x06, 0x05, 0x08, 0x07])
+HEADER_STRUCT = struct.Struct('<Q8I')  # little-endian, matches device header
+HEADER_LEN = HEADER_STRUCT.size
+TLV_HEADER_STRUCT = struct.Struct('<2I')  # type, length
+TLV_HEADER_LEN = TLV_HEADER_STRUCT.size
+
+# TLV type identifiers (3D people tracking demo output)
+TLV_POINT_CLOUD = 1020
+TLV_TRACKS = 1010
+TLV_TARGET_INDEX = 1011
+TLV_TRACK_HEIGHT = 1012
+TLV_PRESENCE = 1021
+
+FRAME_PERIOD = 0.055  # s, frameCfg periodicity in AOP_6m_default.cfg
+
+log = logging.getLogger(__name__)
+
+# TrackTLV target record ('I27f'): one entry per tracked object
+TRACK_DTYPE = np.dtype([
+    ('tid', '<u4'),            # Target ID
+    ('pos', '<f4', (3,)),      # X/Y/Z position (m)
+    ('vel', '<f4', (3,)),      # X/Y/Z velocity (m/s)
+    ('acc', '<f4', (3,)),      # X/Y/Z acceleration (m/s^2)
+    ('ec', '<f4', (4, 4)),     # Error covariance matrix
+    ('g', '<f4'),              # Gating function gain
+    ('confidence', '<f4'),     # Confidence level
+])
+
+
+def decode_track_tlv(payload):
+    """Decode a TrackTLV (1010) payload into a TRACK_DTYPE array.
+
+    The returned array is a read-only view on ``payload``; no per-target
+    Python work or copying is done. Trailing partial records are ignored.
+    """
+    count = len(payload) // TRACK_DTYPE.itemsize
+    return np.frombuffer(payload, dtype=TRACK_DTYPE, count=count)
+
+
+# CompressedSphericalPointCloudTLV (1020): '5f' unit header, then '2bh2H' points
+POINT_UNIT_DTYPE = np.dtype([
+    ('elevation', '<f4'),
+    ('azimuth', '<f4'),
+    ('doppler', '<f4'),
+    ('range', '<f4'),
+    ('snr', '<f4'),
+])
+COMPRESSED_POINT_DTYPE = np.dtype([
+    ('elevation', 'i1'),
+    ('azimuth', 'i1'),
+    ('doppler', '<i2'),
+    ('range', '<u2'),
+    ('snr', '<u2'),
+])
+
+# Decoded point: Cartesian position plus the original spherical measurement
+POINT_DTYPE = np.dtype([
+    ('x', '<f4'),
+    ('y', '<f4'),
+    ('z', '<f4'),
+    ('range', '<f4'),       # m
+    ('azimuth', '<f4'),     # rad
+    ('elevation', '<f4'),   # rad
+    ('doppler', '<f4'),     # m/s
+    ('snr', '<f4'),
+])
+
+# TrackHeightTLV (1012) record ('I2f')
+HEIGHT_DTYPE = np.dtype([
+    ('tid', '<u4'),
+    ('max_z', '<f4'),
+    ('min_z', '<f4'),
+])
+
+# TargetIndexTLV (1011) values >= this are not associated with any track
+# (253: weak SNR, 254: outside boundary box, 255: not associated)
+TARGET_INDEX_UNASSOCIATED = 253
+
+
+def associated(target_index):
+    """Mask of the points that belong to a track.
+
+    Also works for fused multi-radar frames, whose (uint16) target indices
+    are offset by 256 per sensor like their track IDs.
+    """
+    return (target_index & 0xFF) < TARGET_INDEX_UNASSOCIATED
+
+
+def decode_point_cloud_tlv(payload):
+    """Decode a CompressedSphericalPointCloudTLV (1020) payload.
+
+    Applies the unit scales from the TLV header and converts every point
+    from spherical to Cartesian coordinates in one vectorized pass.
+    """
+    if len(payload) < POINT_UNIT_DTYPE.itemsize:
+        return np.empty(0, dtype=POINT_DTYPE)
+
+    units = np.frombuffer(payload, dtype=POINT_UNIT_DTYPE, count=1)[0]
+    count = (len(payload) - POINT_UNIT_DTYPE.itemsize) // COMPRESSED_POINT_DTYPE.itemsize
+    raw = np.frombuffer(payload, dtype=COMPRESSED_POINT_DTYPE, count=count,
+                        offset=POINT_UNIT_DTYPE.itemsize)
+
+    points = np.empty(count, dtype=POINT_DTYPE)
+    rng = np.multiply(raw['range'], units['range'], out=points['range'])
+    az = np.multiply(raw['azimuth'], units['azimuth'], out=points['azimuth'])
+    el = np.multiply(raw['elevation'], units['elevation'], out=points['elevation'])
+    np.multiply(raw['doppler'], units['doppler'], out=points['doppler'])
+    np.multiply(raw['snr'], units['snr'], out=points['snr'])
+
+    rng_cos_el = rng * np.cos(el)
+    np.multiply(rng_cos_el, np.sin(az), out=points['x'])
+    np.multiply(rng_cos_el, np.cos(az), out=points['y'])
+    np.multiply(rng, np.sin(el), out=points['z'])
+    return points
+
+
+def decode_target_index_tlv(payload):
+    """Decode a TargetIndexTLV (1011) payload: one track ID byte per point."""
+    return np.frombuffer(payload, dtype=np.uint8)
+
+
+def decode_track_height_tlv(payload):
+    """Decode a TrackHeightTLV (1012) payload into a HEIGHT_DTYPE array."""
+    count = len(payload) // HEIGHT_DTYPE.itemsize
+    return np.frombuffer(payload, dtype=HEIGHT_DTYPE, count=count)
+
+
+def decode_presence_tlv(payload):
+    """Decode a PresenceIndication TLV (1021) payload."""
+    if len(payload) < 4:
+        return None
+    return bool(np.frombuffer(payload, dtype='<u4', count=1)[0])
+
+
+@dataclass
+class Frame:
+    """One decoded radar frame."""
+    frame_num: int = 0
+    time_cpu_cycles: int = 0
+    num_detected_obj: int = 0
+    subframe_num: int = 0
+    tracks: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=TRACK_DTYPE))
+    points: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=POINT_DTYPE))
+    target_index: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.uint8))
+    heights: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=HEIGHT_DTYPE))
+    presence: bool | None = None
+    clusters: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=CLUSTER_DTYPE))  # set by the publisher
+    timestamp: float = 0.0      # arrival time (time.monotonic()), 0 if unknown
+    num_tlvs: int = 0           # TLV count announced in the header
+    size: int = 0               # raw frame length in bytes
+    parse_us: float = 0.0       # decode time in microseconds (set by the parser stage)
+    tlv_error: bool = False     # a malformed TLV cut decoding short
+
+
+_TLV_DECODERS = {
+    TLV_TRACKS: ('tracks', decode_track_tlv),
+    TLV_POINT_CLOUD: ('points', decode_point_cloud_tlv),
+    TLV_TARGET_INDEX: ('target_index', decode_target_index_tlv),
+    TLV_TRACK_HEIGHT: ('heights', decode_track_height_tlv),
+    TLV_PRESENCE: ('presence', decode_presence_tlv),
+}
+
+
+def decode_frame(frameData):
+    """Decode a complete radar frame (header + TLVs) into a Frame.
+
+    Raises ValueError if the frame header cannot be read. A malformed TLV
+    stops decoding; the TLVs decoded before it are kept.
+    """
+    if len(frameData) < HEADER_LEN:
+        raise ValueError(f"Frame too short for header: {len(frameData)} bytes")
+
+    (magic, version, totalPacketLen, platform, frameNum, timeCPUCycles,
+     numDetectedObj, numTLVs, subFrameNum) = HEADER_STRUCT.unpack_from(frameData)
+
+    frame = Frame(frame_num=frameNum, time_cpu_cycles=timeCPUCycles,
+                  num_detected_obj=numDetectedObj, subframe_num=subFrameNum,
+                  num_tlvs=numTLVs, size=len(frameData))
+
+    view = memoryview(frameData)
+    end = min(len(frameData), totalPacketLen)
+    offset = HEADER_LEN
+    for i in range(numTLVs):
+        if offset + TLV_HEADER_LEN > end:
+            log.error(f'TLV header {i+1}/{numTLVs} truncated at offset {offset}')
+            frame.tlv_error = True
+            break
+        tlvType, tlvLength = TLV_HEADER_STRUCT.unpack_from(frameData, offset)
+        payload_start = offset + TLV_HEADER_LEN
+        if payload_start + tlvLength > end:
+            log.error(f'TLV {tlvType} ({i+1}/{numTLVs}) overruns frame: length {tlvLength}')
+            frame.tlv_error = True
+            break
+
+        decoder = _TLV_DECODERS.get(tlvType)
+        if decoder is not None:
+            name, decode = decoder
+            try:
+                setattr(frame, name, decode(view[payload_start:payload_start + tlvLength]))
+            except Exception as e:
+                log.error(f'TLV parsing error for TLV {i+1}/{numTLVs}: {e}')
+                frame.tlv_error = True
+                break
+
+        offset = payload_start + tlvLength
+
+    return frame
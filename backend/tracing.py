@@ -0,0 +1,105 @@
+"""Per-frame trace records for offline analysis of the acquisition path.
+
+A FrameTracer samples every ``every``-th frame and writes one TRACE_DTYPE
+record per sampled frame to a sink: JSONL (one object per line, easy to
+grep/pandas) or binary (TRACE_MAGIC followed by packed records, readable
+with ``read_trace``). Tracing is off unless a tracer is installed, and
+frames that are not sampled cost one modulo.
+"""
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+
+TRACE_MAGIC = b'BRTRACE1'
+TRACE_DTYPE = np.dtype([
+    ('frame_num', '<u4'),
+    ('timestamp', '<f8'),   # arrival time (time.monotonic())
+    ('bytes', '<u4'),       # raw frame length
+    ('num_tlvs', '<u2'),
+    ('tracks', '<u2'),
+    ('points', '<u2'),
+    ('heights', '<u2'),
+    ('parse_us', '<f4'),    # decode time
+    ('emit_us', '<f4'),     # occupancy update + listeners
+])
+
+
+class JsonlTraceSink:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = self.path.open('a')
+
+    def write(self, record):
+        self._file.write(json.dumps({name: record[name].item() for name in TRACE_DTYPE.names}) + '\n')
+
+    def close(self):
+        self._file.close()
+
+
+class BinaryTraceSink:
+    def __init__(self, path):
+        self.path = Path(path)
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        self._file = self.path.open('ab')
+        if new_file:
+            self._file.write(TRACE_MAGIC)
+
+    def write(self, record):
+        self._file.write(record.tobytes())
+
+    def close(self):
+        self._file.close()
+
+
+def open_sink(path):
+    """JSONL sink for ``*.jsonl`` paths, binary otherwise."""
+    path = Path(path)
+    return JsonlTraceSink(path) if path.suffix == '.jsonl' else BinaryTraceSink(path)
+
+
+def read_trace(path):
+    """Return the records of a binary trace file as a TRACE_DTYPE array."""
+    with open(path, 'rb') as f:
+        if f.read(len(TRACE_MAGIC)) != TRACE_MAGIC:
+            raise ValueError(f"Not a trace file: {path}")
+        return np.frombuffer(f.read(), dtype=TRACE_DTYPE)
+
+
+class FrameTracer:
+    """Samples frames and writes their trace records to ``sink``."""
+
+    def __init__(self, sink, every=1):
+        self.sink = sink
+        self.every = max(1, int(every))
+        self.records = 0
+        self._record = np.zeros((), dtype=TRACE_DTYPE)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def sampled(self, frame_num):
+        return frame_num % self.every == 0
+
+    def record(self, frame, emit_us):
+        """Write the trace record of ``frame``; frames recorded after ``close`` are ignored."""
+        with self._lock:
+            if self._closed:
+                return
+            r = self._record
+            r['frame_num'] = frame.frame_num
+            r['timestamp'] = frame.timestamp
+            r['bytes'] = frame.size
+            r['num_tlvs'] = frame.num_tlvs
+            r['tracks'] = len(frame.tracks)
+            r['points'] = len(frame.points)
+            r['heights'] = len(frame.heights)
+            r['parse_us'] = frame.parse_us
+            r['emit_us'] = emit_us
+            self.sink.write(r)
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self.sink.close()
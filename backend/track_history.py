@@ -0,0 +1,169 @@
+"""Per-target history of tracker output (TLV 1010) in a fixed-size columnar ring buffer.
+
+Every track ID owns one row of preallocated (max_tracks, capacity) arrays;
+a frame's tracks are appended to their rows' ring positions in one
+vectorized write. Rows of tracks not seen for ``max_age`` seconds are
+freed, and when all rows are in use the least recently seen track is
+evicted, so memory stays at its preallocated size however long a ride is.
+"""
+import threading
+
+import numpy as np
+
+# One history sample, as returned by window()
+SAMPLE_DTYPE = np.dtype([
+    ('tid', '<u4'),
+    ('t', '<f8'),
+    ('pos', '<f4', (3,)),
+    ('vel', '<f4', (3,)),
+    ('acc', '<f4', (3,)),
+])
+
+
+class TrackHistory:
+    """Ring buffer of the last ``capacity`` samples of up to ``max_tracks`` track IDs."""
+
+    def __init__(self, max_tracks=256, capacity=128, max_age=2.0):
+        self.max_tracks = max_tracks
+        self.capacity = capacity
+        self.max_age = max_age
+
+        self.t = np.zeros((max_tracks, capacity), dtype=np.float64)
+        self.pos = np.zeros((max_tracks, capacity, 3), dtype=np.float32)
+        self.vel = np.zeros((max_tracks, capacity, 3), dtype=np.float32)
+        self.acc = np.zeros((max_tracks, capacity, 3), dtype=np.float32)
+
+        self.tid = np.zeros(max_tracks, dtype=np.uint32)   # track ID of each row
+        self.head = np.zeros(max_tracks, dtype=np.intp)    # next write position per row
+        self.count = np.zeros(max_tracks, dtype=np.intp)   # valid samples per row
+        self.last_seen = np.full(max_tracks, -np.inf)
+
+        self._rows = {}                                     # tid -> row
+        self._free = list(range(max_tracks - 1, -1, -1))
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, tid):
+        return int(tid) in self._rows
+
+    def append(self, tracks, timestamp):
+        """Add one frame's tracks (TRACK_DTYPE array) observed at ``timestamp``."""
+        with self._lock:
+            self._evict_stale(timestamp)
+            if len(tracks) == 0:
+                return
+            tids = tracks['tid'].tolist()
+            found = [self._rows.get(tid) for tid in tids]
+            if None in found:
+                # New tracks: mark the known ones seen first so allocating a row cannot evict them
+                self.last_seen[[row for row in found if row is not None]] = timestamp
+                found = [self._row(tid, timestamp) if row is None else row for tid, row in zip(tids, found)]
+            rows = np.array(found, dtype=np.intp)
+            self.last_seen[rows] = timestamp
+            cols = self.head[rows]
+            self.t[rows, cols] = timestamp
+            self.pos[rows, cols] = tracks['pos']
+            self.vel[rows, cols] = tracks['vel']
+            self.acc[rows, cols] = tracks['acc']
+            self.head[rows] = (cols + 1) % self.capacity
+            self.count[rows] = np.minimum(self.count[rows] + 1, self.capacity)
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+            self._free = list(range(self.max_tracks - 1, -1, -1))
+            self.count[:] = 0
+            self.head[:] = 0
+            self.last_seen[:] = -np.inf
+
+    def evict_stale(self, now):
+        """Free the rows of tracks not seen since ``now - max_age``."""
+        with self._lock:
+            self._evict_stale(now)
+
+    def history(self, tid):
+        """All retained samples of one track, oldest first (SAMPLE_DTYPE array)."""
+        with self._lock:
+            row = self._rows.get(int(tid))
+            if row is None:
+                return np.empty(0, dtype=SAMPLE_DTYPE)
+            samples, valid = self._gather(np.array([row]))
+            return samples[0][valid[0]]
+
+    def window(self, since, until=np.inf):
+        """Samples of every track with ``since <= t <= until``, grouped by track, oldest first."""
+        with self._lock:
+            rows = np.fromiter(self._rows.values(), dtype=np.intp, count=len(self._rows))
+            samples, valid = self._gather(rows)
+            valid &= (samples['t'] >= since) & (samples['t'] <= until)
+            return samples[valid]
+
+    def trails(self, since=-np.inf):
+        """Per-track x/y polylines for one batched plot item.
+
+        Returns (x, y): every track's positions since ``since``, oldest first,
+        with a NaN after each track so ``connect='finite'`` breaks the lines.
+        """
+        with self._lock:
+            rows = np.fromiter(self._rows.values(), dtype=np.intp, count=len(self._rows))
+            order, valid = self._order(rows)
+            valid &= self.t[rows[:, None], order] >= since
+            x = np.full((len(rows), self.capacity + 1), np.nan, dtype=np.float32)
+            y = np.full_like(x, np.nan)
+            xy = self.pos[rows[:, None], order]
+            x[:, :-1] = np.where(valid, xy[..., 0], np.nan)
+            y[:, :-1] = np.where(valid, xy[..., 1], np.nan)
+            return x.ravel(), y.ravel()
+
+    # -------------------------------------------------
+    def _row(self, tid, timestamp):
+        row = self._rows.get(tid)
+        if row is None:
+            if not self._free:
+                # Full: reuse the row of the least recently seen track
+                active = np.fromiter(self._rows.values(), dtype=np.intp, count=len(self._rows))
+                self._release(int(active[np.argmin(self.last_seen[active])]))
+            row = self._free.pop()
+            self._rows[tid] = row
+            self.tid[row] = tid
+            self.head[row] = 0
+            self.count[row] = 0
+        # Mark seen right away so an eviction later in this frame cannot pick it
+        self.last_seen[row] = timestamp
+        return row
+
+    def _release(self, row):
+        del self._rows[int(self.tid[row])]
+        self.count[row] = 0
+        self.last_seen[row] = -np.inf
+        self._free.append(row)
+        self.evicted += 1
+
+    def _evict_stale(self, now):
+        if not self._rows:
+            return
+        rows = np.fromiter(self._rows.values(), dtype=np.intp, count=len(self._rows))
+        for row in rows[self.last_seen[rows] < now - self.max_age].tolist():
+            self._release(row)
+
+    def _order(self, rows):
+        """Column indices of each row's samples, oldest first, and which of them are valid."""
+        k = np.arange(self.capacity)
+        start = (self.head[rows] - self.count[rows])[:, None]
+        order = (start + k) % self.capacity
+        valid = k < self.count[rows][:, None]
+        return order, valid
+
+    def _gather(self, rows):
+        order, valid = self._order(rows)
+        r = rows[:, None]
+        samples = np.empty(order.shape, dtype=SAMPLE_DTYPE)
+        samples['tid'] = self.tid[r]
+        samples['t'] = self.t[r, order]
+        samples['pos'] = self.pos[r, order]
+        samples['vel'] = self.vel[r, order]
+        samples['acc'] = self.acc[r, order]
+        return samples, valid
@@ -0,0 +1,68 @@
+"""Benchmark: frame decoding throughput in-thread vs. ProcessFrameParser workers.
+
+Run from the repository root:
+    python -m benchmarks.bench_process_parser [--frames 2000] [--targets 100] [--points 30]
+"""
+import argparse
+import os
+import time
+
+from backend.process_parser import ProcessFrameParser
+from backend.simulator import RadarSimulator
+from backend.tlv import decode_frame
+
+
+def bench_inline(frames):
+    start = time.perf_counter()
+    for raw in frames:
+        decode_frame(raw)
+    return len(frames) / (time.perf_counter() - start)
+
+
+def bench_workers(frames, num_workers):
+    parser = ProcessFrameParser(num_workers)
+    try:
+        # Warm up: spawn cost and first imports are not part of the steady state
+        parser.submit(frames[0])
+        while parser.in_flight:
+            parser.collect(timeout=0.1)
+
+        received = 0
+        start = time.perf_counter()
+        for raw in frames:
+            parser.submit(raw)
+            received += len(parser.collect())
+        while parser.in_flight:
+            received += len(parser.collect(timeout=0.1))
+        elapsed = time.perf_counter() - start
+    finally:
+        parser.close()
+    assert received == len(frames)
+    return len(frames) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--targets', type=int, default=100)
+    parser.add_argument('--points', type=int, default=30, help='points per target')
+    args = parser.parse_args()
+
+    sim = RadarSimulator(args.targets, points_per_target=args.points, seed=0)
+    frames = [sim.make_frame() for _ in range(args.frames)]
+    print(f"{args.frames} frames, {args.targets} tracks, {args.targets * args.points} points, "
+          f"{len(frames[0])} bytes each")
+
+    baseline = bench_inline(frames)
+    print(f"{'mode':>10} {'frames/s':>10} {'scaling':>8}")
+    print(f"{'inline':>10} {baseline:>10.0f} {1.0:>7.2f}x")
+    max_workers = os.cpu_count() or 1
+    for n in (1, 2, 4, 8):
+        if n > max_workers:
+            break
+        rate = bench_workers(frames, n)
+        print(f"{f'{n} worker' + ('s' if n > 1 else ''):>10} {rate:>10.0f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
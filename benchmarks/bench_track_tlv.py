@@ -0,0 +1,64 @@
+"""Micro-benchmark: vectorized TrackTLV decoder vs. the per-target struct loop.
+
+Run from the repository root:
+    python -m benchmarks.bench_track_tlv
+"""
+import struct
+import timeit
+
+import numpy as np
+
+from backend.tlv import TRACK_DTYPE, decode_track_tlv
+
+
+def legacy_parse_track_tlv(tlvData, tlvLength):
+    """Original per-target decoder (without the per-target print)."""
+    targetStruct = 'I27f'
+    targetSize = struct.calcsize(targetStruct)
+    numDetectedTargets = int(tlvLength / targetSize)
+    targets = np.empty((numDetectedTargets, 16))
+
+    for i in range(numDetectedTargets):
+        targetData = struct.unpack(targetStruct, tlvData[:targetSize])
+        targets[i, 0] = targetData[0]
+        targets[i, 1:10] = targetData[1:10]
+        targets[i, 10] = targetData[26]
+        targets[i, 11] = targetData[27]
+        tlvData = tlvData[targetSize:]
+
+    return numDetectedTargets, targets
+
+
+def make_payload(num_targets, seed=0):
+    rng = np.random.default_rng(seed)
+    records = np.zeros(num_targets, dtype=TRACK_DTYPE)
+    records['tid'] = np.arange(num_targets)
+    records['pos'] = rng.uniform(-5, 5, (num_targets, 3))
+    records['vel'] = rng.normal(0, 2, (num_targets, 3))
+    records['acc'] = rng.normal(0, 0.5, (num_targets, 3))
+    records['g'] = 1.0
+    records['confidence'] = rng.uniform(0, 1, num_targets)
+    return records.tobytes()
+
+
+def main():
+    print(f"{'targets':>8} {'legacy us':>12} {'vectorized us':>14} {'speedup':>8}")
+    for num_targets in (1, 5, 20, 50, 100, 250):
+        payload = make_payload(num_targets)
+        length = len(payload)
+
+        # Sanity check: both paths must agree
+        _, legacy = legacy_parse_track_tlv(payload, length)
+        fast = decode_track_tlv(payload)
+        assert np.array_equal(legacy[:, 0], fast['tid'])
+        assert np.allclose(legacy[:, 1:4], fast['pos'])
+        assert np.allclose(legacy[:, 11], fast['confidence'])
+
+        n = 2000
+        t_legacy = timeit.timeit(lambda: legacy_parse_track_tlv(payload, length), number=n) / n
+        t_fast = timeit.timeit(lambda: decode_track_tlv(payload), number=n) / n
+        print(f"{num_targets:>8} {t_legacy * 1e6:>12.1f} {t_fast * 1e6:>14.2f} {t_legacy / t_fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
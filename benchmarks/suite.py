@@ -0,0 +1,361 @@
+"""Benchmark suite for the parse, bin and render hot paths.
+
+Every case runs on seeded synthetic frames (backend.simulator) in a fresh
+worker process, so results do not depend on which cases ran before it
+(allocator and cache state, Qt teardown). Each case times individual
+operations and reports throughput and p50/p99 latency; the case is
+repeated ``--rounds`` times and the round with the lowest p50 is kept, which
+filters out interference from the rest of the machine. With a baseline file, a case fails when its p50 is
+more than ``--tolerance`` slower than the stored p50 (p99 is reported but
+too noisy to gate on). Baselines are machine specific: record one on the
+machine that runs the comparison.
+
+Run from the repository root:
+    python -m benchmarks.suite                      # run, compare with benchmarks/baseline.json
+    python -m benchmarks.suite --save-baseline      # run and store a new baseline
+    python -m benchmarks.suite --only parse --quick
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend.core import RadarCore
+from backend.frame_sync import FrameSynchronizer
+from backend.simulator import RadarSimulator
+from backend.tlv import TLV_HEADER_LEN, HEADER_LEN, TLV_TRACKS, TLV_HEADER_STRUCT, decode_frame
+
+BASELINE = Path(__file__).with_name("baseline.json")
+TARGET_COUNTS = (0, 10, 50, 100, 250)
+# (name, dx deg, dy m) over the default 24 deg x 120 m polar area
+GRID_SIZES = (("24x24", 1.0, 5.0), ("96x240", 0.25, 0.5), ("240x1200", 0.1, 0.1))
+GRID_AREA = {"x_min": -12.0, "x_max": 12.0, "y_min": 0.0, "y_max": 120.0}
+
+
+def make_frames(num_targets, count=64, seed=0, points_per_target=8):
+    sim = RadarSimulator(num_targets, points_per_target=points_per_target,
+                         x_range=(-10.0, 10.0), y_range=(5.0, 110.0), seed=seed)
+    return [sim.make_frame() for _ in range(count)]
+
+
+def make_core(dx=1.0, dy=5.0):
+    core = RadarCore()
+    core.create_grid(dict(GRID_AREA, dx=dx, dy=dy))
+    return core
+
+
+def track_payload(frame):
+    """Return the TrackTLV (1010) payload of an encoded frame."""
+    offset = HEADER_LEN
+    while offset < len(frame):
+        tlv_type, length = TLV_HEADER_STRUCT.unpack_from(frame, offset)
+        offset += TLV_HEADER_LEN
+        if tlv_type == TLV_TRACKS:
+            return frame[offset:offset + length]
+        offset += length
+    return b''
+
+
+def time_ops(op, args, repeat, warmup=20):
+    """Call ``op(arg)`` cycling over ``args``; returns per-call durations in us."""
+    for i in range(warmup):
+        op(args[i % len(args)])
+    samples = np.empty(repeat)
+    clock = time.perf_counter_ns
+    for i in range(repeat):
+        arg = args[i % len(args)]
+        start = clock()
+        op(arg)
+        samples[i] = clock() - start
+    return samples / 1000.0
+
+
+# -------------------------------------------------
+# Cases: each returns (durations in us, units processed per op, unit name)
+# -------------------------------------------------
+def bench_sync(repeat):
+    """Magic-word sync over a noisy stream: 100 frames with random garbage between them, in 4 KiB reads."""
+    rng = np.random.default_rng(1)
+    parts = []
+    for frame in make_frames(20, count=100):
+        parts.append(rng.integers(0, 256, int(rng.integers(0, 200)), dtype=np.uint8).tobytes())
+        parts.append(frame)
+    stream = b''.join(parts)
+    chunk = 4096
+    chunks = [stream[i:i + chunk] for i in range(0, len(stream), chunk)]
+
+    sync = FrameSynchronizer()
+
+    def op(_):
+        for data in chunks:
+            while data:
+                data = data[sync.feed(data):]
+                while sync.next_frame() is not None:
+                    pass
+
+    return time_ops(op, [None], max(repeat // 10, 20)), len(stream) / 1e6, "MB"
+
+
+def bench_parse_standard_frame(num_targets):
+    def run(repeat):
+        frames = make_frames(num_targets)
+        core = make_core()
+        return time_ops(core.parse_standard_frame, frames, repeat), 1, "frames"
+    return run
+
+
+def bench_decode_frame(num_targets):
+    def run(repeat):
+        return time_ops(decode_frame, make_frames(num_targets), repeat), 1, "frames"
+    return run
+
+
+def bench_parse_track_tlv(num_targets):
+    def run(repeat):
+        payloads = [track_payload(f) for f in make_frames(num_targets)]
+        core = RadarCore()
+        return time_ops(lambda p: core.parse_track_tlv(p, len(p)), payloads, repeat), 1, "TLVs"
+    return run
+
+
+def bench_rescale(num_targets):
+    def run(repeat):
+        tracks = [decode_frame(f).tracks for f in make_frames(num_targets)]
+        core = make_core()
+        return time_ops(core.rescale_and_emit_points, tracks, repeat), 1, "frames"
+    return run
+
+
+def bench_occupancy(dx, dy):
+    def run(repeat):
+        frames = [decode_frame(f) for f in make_frames(50)]
+        core = make_core(dx, dy)
+        return time_ops(core.update_occupancy, frames, repeat), 1, "frames"
+    return run
+
+
+def bench_collision(num_targets):
+    """Threat assessment, hysteresis and threatened-cell map (RadarCore.update_threats)."""
+    def run(repeat):
+        frames = [decode_frame(f) for f in make_frames(num_targets)]
+        core = make_core()
+        return time_ops(core.update_threats, frames, repeat), 1, "frames"
+    return run
+
+
+def bench_clustering(num_targets):
+    """Spatial-hash DBSCAN of the point cloud (8 points per target) at the default grid's eps."""
+    def run(repeat):
+        frames = [decode_frame(f) for f in make_frames(num_targets)]
+        core = make_core()
+        core.set_clustering(True)
+        return time_ops(core.update_clusters, frames, repeat), 1, "frames"
+    return run
+
+
+def bench_bin_stats(num_targets):
+    """Per-cell statistics update on the grid and base lattice (BinStatistics.update)."""
+    def run(repeat):
+        frames = [decode_frame(f) for f in make_frames(num_targets)]
+        stats = make_core().bin_stats
+        return time_ops(lambda f: stats.update(f.tracks, 0.0, f.frame_num), frames, repeat), 1, "frames"
+    return run
+
+
+def bench_bin_stats_regrid(dx, dy):
+    """Carrying the statistics of 2000 frames over to a new grid (BinStatistics.set_grid)."""
+    def run(repeat):
+        frames = [decode_frame(f) for f in make_frames(50, 2000)]
+        core = make_core()
+        for f in frames:
+            core.bin_stats.update(f.tracks, 0.0, f.frame_num)
+        binner = make_core(dx, dy).binner
+        return time_ops(core.bin_stats.set_grid, [binner], repeat), 1, "grids"
+    return run
+
+
+def bench_image_item(dx, dy):
+    """Offscreen pyqtgraph ImageItem.setImage from the occupancy view, as MainWindow does."""
+    def run(repeat):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        try:
+            import pyqtgraph as pg
+            from PySide6.QtWidgets import QApplication
+        except ImportError as e:
+            raise Skip(f"Qt not available: {e}")
+        QApplication.instance() or QApplication([])
+
+        core = make_core(dx, dy)
+        for f in make_frames(50):
+            core.update_occupancy(decode_frame(f))
+        ny, nx = core.occupancy.shape
+        view = np.empty((ny, nx), dtype=np.float32)
+        image = pg.ImageItem(axisOrder='row-major')
+        image.setLookupTable(np.array([[30, 30, 30], [0, 200, 0]], dtype=np.uint8))
+
+        def op(_):
+            image.setImage(core.occupancy.probability(view), autoLevels=False, levels=(0, 1))
+            image.render()  # the level/LUT -> QImage conversion a repaint performs
+
+        # Fewer repetitions: PySide6 < 6.13 on Python < 3.12 leaks a reference to
+        # True per signal emit (setImage emits one), so long runs abort the interpreter
+        return time_ops(op, [None], max(repeat // 4, 50)), 1, "frames"
+    return run
+
+
+def bench_detection_overlay(num_targets, points_per_target):
+    """Offscreen point-cloud/track overlay update plus a repaint of the plot, as MainWindow does."""
+    def run(repeat):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        try:
+            import pyqtgraph as pg
+            from PySide6.QtWidgets import QApplication
+            from frontend.overlay import DetectionOverlay
+        except ImportError as e:
+            raise Skip(f"Qt not available: {e}")
+        QApplication.instance() or QApplication([])
+
+        core = make_core()
+        frames = [decode_frame(f) for f in make_frames(num_targets, 16, points_per_target=points_per_target)]
+        plot = pg.PlotWidget()
+        plot.resize(900, 700)
+        plot.setXRange(GRID_AREA["x_min"], GRID_AREA["x_max"], padding=0)
+        plot.setYRange(GRID_AREA["y_min"], GRID_AREA["y_max"], padding=0)
+        overlay = DetectionOverlay(plot)
+
+        def op(frame):
+            overlay.update(frame, core.binner)
+            plot.grab()
+
+        # setData emits signals too: same PySide6 leak as bench_image_item
+        return time_ops(op, frames, max(repeat // 4, 50)), 1, "frames"
+    return run
+
+
+class Skip(Exception):
+    pass
+
+
+CASES = {"sync/noisy_stream": bench_sync}
+for n in TARGET_COUNTS:
+    CASES[f"parse_standard_frame/{n}_targets"] = bench_parse_standard_frame(n)
+for n in TARGET_COUNTS:
+    CASES[f"decode_frame/{n}_targets"] = bench_decode_frame(n)
+for n in (10, 250):
+    CASES[f"parse_track_tlv/{n}_targets"] = bench_parse_track_tlv(n)
+for n in (10, 250):
+    CASES[f"rescale_and_emit_points/{n}_targets"] = bench_rescale(n)
+for name, dx, dy in GRID_SIZES:
+    CASES[f"occupancy_update/{name}"] = bench_occupancy(dx, dy)
+for n in (50, 250):
+    CASES[f"collision/{n}_targets"] = bench_collision(n)
+for n in (50, 100):
+    CASES[f"clustering/{n}_targets"] = bench_clustering(n)
+for n in (50, 250):
+    CASES[f"bin_stats/{n}_targets"] = bench_bin_stats(n)
+for name, dx, dy in GRID_SIZES[:2]:
+    CASES[f"bin_stats_regrid/{name}"] = bench_bin_stats_regrid(dx, dy)
+for name, dx, dy in GRID_SIZES:
+    CASES[f"image_item/{name}"] = bench_image_item(dx, dy)
+for n, p in ((20, 8), (100, 40)):
+    CASES[f"detection_overlay/{n * p}_points"] = bench_detection_overlay(n, p)
+
+
+def summarize(samples, units, unit):
+    total_s = samples.sum() / 1e6
+    return {
+        "p50_us": float(np.percentile(samples, 50)),
+        "p99_us": float(np.percentile(samples, 99)),
+        "throughput": float(len(samples) * units / total_s) if total_s > 0 else 0.0,
+        "unit": f"{unit}/s",
+    }
+
+
+def run_case(name, repeat):
+    """Run one case (in a worker process); returns its summary, or a skip reason string."""
+    try:
+        samples, units, unit = CASES[name](repeat)
+    except Skip as e:
+        return str(e)
+    return summarize(samples, units, unit)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000, help="timed operations per case")
+    parser.add_argument("--rounds", type=int, default=3, help="worker processes per case; the best p50 is kept")
+    parser.add_argument("--quick", action="store_true", help="200 operations and 1 round per case")
+    parser.add_argument("--only", help="run only cases whose name contains this string")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed p50 slowdown vs the baseline (0.5 = 50%%)")
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    args = parser.parse_args(argv)
+    repeat = 200 if args.quick else args.repeat
+    rounds = 1 if args.quick else max(1, args.rounds)
+
+    baseline = {}
+    if args.baseline.exists() and not args.save_baseline:
+        baseline = json.loads(args.baseline.read_text()).get("results", {})
+
+    results = {}
+    regressions = []
+    print(f"{'case':<40} {'throughput':>16} {'p50 us':>10} {'p99 us':>10} {'vs base':>8}")
+    names = [name for name in CASES if not args.only or args.only in name]
+    with mp.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+        for name in names:
+            runs = [pool.apply(run_case, (name, repeat)) for _ in range(rounds)]
+            if isinstance(runs[0], str):
+                print(f"{name:<40} skipped: {runs[0]}")
+                continue
+            result = results[name] = min(runs, key=lambda r: r["p50_us"])
+
+            base = baseline.get(name)
+            ratio = ""
+            if base:
+                r = result["p50_us"] / base["p50_us"]
+                ratio = f"{r:.2f}x"
+                if r > 1 + args.tolerance:
+                    regressions.append((name, base["p50_us"], result["p50_us"]))
+                    ratio += " !"
+            print(f"{name:<40} {result['throughput']:>10.0f} {result['unit']:<5} "
+                  f"{result['p50_us']:>10.1f} {result['p99_us']:>10.1f} {ratio:>8}", flush=True)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpus": os.cpu_count(),
+            "repeat": repeat,
+            "rounds": rounds,
+        },
+        "results": results,
+    }
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2) + "\n")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for name, base, now in regressions:
+            print(f"  {name}: p50 {base:.1f} us -> {now:.1f} us")
+        return 1
+    if baseline:
+        print("\nNo regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
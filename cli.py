@@ -0,0 +1,184 @@
+"""Headless bike radar: configure, read and print/log/record without Qt.
+
+Examples:
+    python cli.py --config-port COM19 --data-port COM20 --cfg AOP_6m_default.cfg
+    python cli.py --replay ride.bin --speed 0 --output jsonl > ride.jsonl
+    python cli.py --sim 20 --duration 10 --record sim.bin
+    python cli.py --replay ride.bin --speed 0 --output none --export ride-session
+"""
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+
+from backend.binning import CARTESIAN, POLAR
+from backend.core import RadarCore
+
+
+def build_source(args):
+    if args.replay:
+        from backend.recording import ReplaySource
+        return ReplaySource(args.replay, speed=args.speed)
+    if args.tcp:
+        from backend.sources import SocketSource
+        host, port = args.tcp.rsplit(':', 1)
+        return SocketSource(host, int(port))
+    if args.sim is not None:
+        from backend.simulator import RadarSimulator
+        from backend.sources import SyntheticSource
+        return SyntheticSource(RadarSimulator(args.sim), speed=args.speed)
+    from backend.sources import SerialSource
+    return SerialSource(args.data_port, args.baud)
+
+
+def frame_record(frame, occupancy=None):
+    """One JSON-serializable line per frame."""
+    tracks = frame.tracks
+    record = {
+        "frame": frame.frame_num,
+        "t": round(frame.timestamp, 6),
+        "presence": frame.presence,
+        "points": len(frame.points),
+        "tracks": [
+            {"id": int(t), "x": round(float(p[0]), 3), "y": round(float(p[1]), 3),
+             "z": round(float(p[2]), 3), "vx": round(float(v[0]), 3), "vy": round(float(v[1]), 3),
+             "conf": round(float(c), 3)}
+            for t, p, v, c in zip(tracks['tid'], tracks['pos'], tracks['vel'], tracks['confidence'])
+        ],
+        "clusters": [
+            {"n": int(c['num_points']), "x": round(float(c['centroid'][0]), 3), "y": round(float(c['centroid'][1]), 3),
+             "w": round(float(c['max'][0] - c['min'][0]), 3), "l": round(float(c['max'][1] - c['min'][1]), 3),
+             "doppler": round(float(c['doppler']), 3)}
+            for c in frame.clusters
+        ],
+    }
+    if occupancy is not None:
+        record["occupied"] = int((occupancy.log_odds > occupancy.threshold).sum())
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog="\n".join(__doc__.splitlines()[2:]))
+    src = parser.add_argument_group("source (default: serial --data-port)")
+    src.add_argument("--data-port", default="COM20")
+    src.add_argument("--baud", type=int, default=921600)
+    src.add_argument("--replay", type=Path, help="replay a capture recorded with --record")
+    src.add_argument("--tcp", metavar="HOST:PORT", help="read frames from a TCP stream")
+    src.add_argument("--sim", type=int, metavar="TARGETS", help="in-process simulator")
+    src.add_argument("--speed", type=float, default=1.0,
+                     help="replay/simulator speed multiple; 0 = as fast as possible")
+
+    cfg = parser.add_argument_group("configuration")
+    cfg.add_argument("--config-port", help="radar CLI port; omit to skip configuration")
+    cfg.add_argument("--cfg", type=Path, default=Path("AOP_6m_default.cfg"))
+    cfg.add_argument("--force-config", action="store_true",
+                     help="upload the cfg even if it is unchanged since the last upload")
+
+    grid = parser.add_argument_group("grid")
+    grid.add_argument("--grid", type=float, nargs=6, default=[-12, 12, 0, 120, 1, 5],
+                      metavar=("XMIN", "XMAX", "YMIN", "YMAX", "DX", "DY"))
+    grid.add_argument("--cartesian", action="store_true", help="bin x/y instead of angle/range")
+
+    out = parser.add_argument_group("output")
+    out.add_argument("--output", choices=("summary", "jsonl", "none"), default="summary")
+    out.add_argument("--record", type=Path, help="append raw frames to this capture file")
+    out.add_argument("--duration", type=float, help="stop after this many seconds")
+    out.add_argument("--trace", type=Path,
+                     help="write per-frame trace records here (JSONL for *.jsonl, else binary)")
+    out.add_argument("--trace-every", type=int, default=1, metavar="N",
+                     help="trace every N-th frame")
+    out.add_argument("--export", type=Path, metavar="DIR",
+                     help="write decoded tracks, points and occupancy snapshots to this session directory")
+    out.add_argument("--export-format", choices=("parquet", "npz"),
+                     help="session file format (default: parquet if pyarrow is installed, else npz)")
+    out.add_argument("--stream-port", type=int,
+                     help="stream occupancy deltas and tracks to remote viewers on this port "
+                          "(view with: python -m backend.grid_stream HOST:PORT)")
+    out.add_argument("--stream-host", default="127.0.0.1",
+                     help="interface for --stream-port (0.0.0.0 for other machines)")
+    out.add_argument("--metrics-port", type=int,
+                     help="serve /metrics (Prometheus text) and /metrics.json on this local port")
+    out.add_argument("--log-level", default="WARNING",
+                     choices=("DEBUG", "INFO", "WARNING", "ERROR"),
+                     help="DEBUG logs a line per decoded frame")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level, format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+
+    core = RadarCore()
+    core.binning_mode = CARTESIAN if args.cartesian else POLAR
+    # JSONL records carry the clusters of each frame
+    core.set_clustering(args.output == "jsonl")
+    x_min, x_max, y_min, y_max, dx, dy = args.grid
+    if core.create_grid({"x_min": x_min, "x_max": x_max, "y_min": y_min,
+                         "y_max": y_max, "dx": dx, "dy": dy}) is None:
+        return 2
+
+    if args.config_port:
+        result = core.send_config(args.config_port, args.cfg, skip_if_unchanged=not args.force_config)
+        if result is None or not result.ok:
+            return 1
+
+    if args.record:
+        core.start_recording(args.record)
+    if args.trace:
+        core.start_tracing(args.trace, args.trace_every)
+    if args.export:
+        try:
+            core.start_export(args.export, args.export_format)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+    if args.stream_port:
+        core.serve_grid_stream(args.stream_port, args.stream_host)
+    if args.metrics_port:
+        core.serve_metrics(args.metrics_port)
+
+    stop = threading.Event()
+    timer = None
+    if args.duration:
+        timer = threading.Timer(args.duration, stop.set)
+        timer.daemon = True
+        timer.start()
+
+    frames = 0
+    window_start = time.monotonic()
+    window_frames = 0
+    try:
+        for frame in core.frames(build_source(args), stop):
+            frames += 1
+            if args.output == "jsonl":
+                sys.stdout.write(json.dumps(frame_record(frame, core.occupancy)) + "\n")
+            elif args.output == "summary":
+                window_frames += 1
+                now = time.monotonic()
+                if now - window_start >= 1.0:
+                    occupied = int((core.occupancy.log_odds > core.occupancy.threshold).sum())
+                    print(f"frame {frame.frame_num}: {window_frames / (now - window_start):.1f} fps, "
+                          f"{len(frame.tracks)} tracks, {len(frame.points)} points, "
+                          f"{occupied} occupied cells", file=sys.stderr)
+                    window_start, window_frames = now, 0
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        if timer is not None:
+            timer.cancel()
+        core.stop_recording()
+        core.stop_tracing()
+        core.stop_export()
+        core.stop_grid_stream()
+        core.stop_metrics()
+
+    m = core.metrics.snapshot()
+    print(f"{frames} frames processed; parse p99 {m['parse_us']['p99']:.0f} us, "
+          f"latency p99 {m['latency_us']['p99']:.0f} us, resyncs {m['sync_resyncs']}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,9 @@
+import time
+from pathlib import Path
+
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QRadioButton, QGroupBox,
+    QPushButton, QRadioButton, QGroupBox, QCheckBox,
     QLabel, QDoubleSpinBox, QSizePolicy, QFileDialog
 )
 from PySide6.QtCore import QTimer
@@ -8,22 +11,42 @@ import pyqtgraph as pg
 import pyqtgraph.exporters as pg_exporters
 import numpy as np
 
+from backend.binning import CARTESIAN, POLAR
+from backend.collision import CAUTION, WARNING
+from frontend.overlay import DetectionOverlay, SNR, TRACK
+
+
+# Seconds of track history drawn as trails
+TRAIL_SECONDS = 3.0
+
 
 class MainWindow(QWidget):
-    def __init__(self, backend):
+    def __init__(self, backend, display_rate=30.0):
         super().__init__()
 
         self.backend = backend
         self.setWindowTitle("Bike Radar Grid Setup")
 
-        self.grid = None                 # occupancy grid (0/1)
+        self.grid = None                 # thresholded occupancy view (0/1)
+        self.prob = None                 # continuous occupancy view (0..1)
         self.current_index = 0           # AUTO traversal index
+        self.selected_bin = None         # (ix, iy) of the highlighted bin
+        self.display_rate = display_rate # repaint rate (Hz); 0 repaints on every frame
+        self.frames_shown = 0
+        self.frames_skipped = 0
+        self._shown_update = -1          # occupancy.updates at the last repaint
+        self._display_latency = backend.metrics.histogram("display_latency_us")
+        self._stats_last = (time.monotonic(), 0)   # (time, frames_published) at the last overlay refresh
 
         self._build_ui()
 
         # Backend connections
         self.backend.grid_ready.connect(self.update_grid)
-        self.backend.radar_points_ready.connect(self.update_radar_points)
+        if self.display_rate > 0:
+            # Coalesced mode: repaint only the latest state at the display rate
+            self.render_timer.start(int(1000 / self.display_rate))
+        else:
+            self.backend.frame_ready.connect(self.on_frame)
 
     # -------------------------------------------------
     # UI BUILD
@@ -47,9 +70,54 @@ class MainWindow(QWidget):
         self.dx   = self._dspin("Cell Size X (deg)", grid_layout, 1.0)
         self.dy   = self._dspin("Cell Size Y (m)", grid_layout, 5.0)
 
+        binning_row = QHBoxLayout()
+        binning_row.addWidget(QLabel("Binning:"))
+        self.polar_btn = QRadioButton("Angle/Range")
+        self.cartesian_btn = QRadioButton("X/Y")
+        self.polar_btn.setChecked(True)
+        binning_row.addStretch(1)
+        binning_row.addWidget(self.polar_btn)
+        binning_row.addWidget(self.cartesian_btn)
+        grid_layout.addLayout(binning_row)
+
         grid_box.setLayout(grid_layout)
         left_panel.addWidget(grid_box)
 
+        # -------- OCCUPANCY DISPLAY --------
+        display_box = QGroupBox("Occupancy Display")
+        display_layout = QHBoxLayout()
+        self.occupied_btn = QRadioButton("Occupied")
+        self.probability_btn = QRadioButton("Probability")
+        self.occupied_btn.setChecked(True)
+        self.trails_btn = QCheckBox("Trails")
+        self.trails_btn.setChecked(True)
+        display_layout.addWidget(self.occupied_btn)
+        display_layout.addWidget(self.probability_btn)
+        display_layout.addWidget(self.trails_btn)
+        self.clusters_btn = QCheckBox("Clusters")
+        self.clusters_btn.setChecked(True)
+        display_layout.addWidget(self.clusters_btn)
+        display_box.setLayout(display_layout)
+        left_panel.addWidget(display_box)
+
+        # -------- DETECTIONS --------
+        detections_box = QGroupBox("Detections")
+        detections_layout = QHBoxLayout()
+        self.points_btn = QCheckBox("Points")
+        self.points_btn.setChecked(True)
+        self.tracks_btn = QCheckBox("Tracks")
+        self.tracks_btn.setChecked(True)
+        self.snr_color_btn = QRadioButton("SNR")
+        self.track_color_btn = QRadioButton("Track ID")
+        self.snr_color_btn.setChecked(True)
+        detections_layout.addWidget(self.points_btn)
+        detections_layout.addWidget(self.tracks_btn)
+        detections_layout.addStretch(1)
+        detections_layout.addWidget(self.snr_color_btn)
+        detections_layout.addWidget(self.track_color_btn)
+        detections_box.setLayout(detections_layout)
+        left_panel.addWidget(detections_box)
+
         # -------- CREATE GRID --------
         self.create_btn = QPushButton("Create Grid")
         self.create_btn.setFixedHeight(30)
@@ -62,6 +130,24 @@ class MainWindow(QWidget):
         self.export_btn.clicked.connect(self.export_plot)
         left_panel.addWidget(self.export_btn)
 
+        self.session_btn = QPushButton("Export Session")
+        self.session_btn.setCheckable(True)
+        self.session_btn.setFixedHeight(30)
+        self.session_btn.toggled.connect(self.export_session)
+        left_panel.addWidget(self.session_btn)
+
+        # -------- COLLISION ALERT --------
+        self.alert_label = QLabel("No threats")
+        self.alert_label.setWordWrap(True)
+        left_panel.addWidget(self.alert_label)
+
+        # -------- RENDER STATS --------
+        self.render_stats = QLabel("Frames shown: 0  skipped: 0")
+        left_panel.addWidget(self.render_stats)
+        self.stats_btn = QCheckBox("Stats overlay")
+        self.stats_btn.setChecked(True)
+        left_panel.addWidget(self.stats_btn)
+
         # -------- MODE --------
         mode_box = QGroupBox("Mode")
         mode_layout = QVBoxLayout()
@@ -78,9 +164,14 @@ class MainWindow(QWidget):
         self.auto_interval.setSingleStep(0.5)
         timing_row.addWidget(self.auto_interval)
 
+        self.bin_info = QLabel("No bin selected")
+        self.bin_info.setStyleSheet("font-family: monospace;")
+        self.bin_info.setMinimumHeight(3 * self.bin_info.fontMetrics().lineSpacing())
+
         mode_layout.addWidget(self.manual_btn)
         mode_layout.addWidget(self.auto_btn)
         mode_layout.addLayout(timing_row)
+        mode_layout.addWidget(self.bin_info)
         mode_box.setLayout(mode_layout)
 
         left_panel.addWidget(mode_box)
@@ -99,7 +190,7 @@ class MainWindow(QWidget):
         self.plot.setMouseEnabled(False, False)
         self.plot.getPlotItem().layout.setContentsMargins(0, 0, 0, 0)
 
-        self.image = pg.ImageItem()
+        self.image = pg.ImageItem(axisOrder='row-major')
         self.plot.addItem(self.image)
 
         # ---- OCCUPANCY LUT ----
@@ -108,6 +199,12 @@ class MainWindow(QWidget):
             [  0, 255,   0, 255],   # 1 → green
         ], dtype=np.uint8)
 
+        # ---- PROBABILITY LUT (red → green) ----
+        ramp = np.linspace(0, 255, 256).astype(np.uint8)
+        self.prob_lut = np.column_stack([
+            255 - ramp, ramp, np.zeros(256, np.uint8), np.full(256, 255, np.uint8)
+        ])
+
         # ---- HIGHLIGHT (AUTO / MANUAL) ----
         self.highlight = pg.RectROI(
             [0, 0], [1, 1],
@@ -116,17 +213,74 @@ class MainWindow(QWidget):
         self.highlight.setVisible(False)
         self.plot.addItem(self.highlight)
 
+        # ---- THREAT CELLS (cells approaching vehicles will cross) ----
+        self.threat_lut = np.array([
+            [  0,   0,   0,   0],   # none → transparent
+            [255, 165,   0, 170],   # caution → orange
+            [255,   0, 255, 220],   # warning → magenta (stands out on red/green)
+        ], dtype=np.uint8)
+        self.threat_image = pg.ImageItem(axisOrder='row-major')
+        self.threat_image.setZValue(5)
+        self.plot.addItem(self.threat_image)
+        self._flash_on = True
+
+        # ---- TRACK TRAILS (all tracks in one item, NaN-separated) ----
+        self.trails = pg.PlotDataItem(connect='finite', pen=pg.mkPen((255, 255, 0), width=2))
+        self.trails.setZValue(10)
+        self.plot.addItem(self.trails)
+
+        # ---- POINT-CLOUD CLUSTERS (centroids, one item) ----
+        self.cluster_marks = pg.ScatterPlotItem(
+            symbol='o', size=14, pen=pg.mkPen((0, 255, 255), width=2), brush=None
+        )
+        self.cluster_marks.setZValue(11)
+        self.plot.addItem(self.cluster_marks)
+
+        # ---- POINT CLOUD AND TRACKS (one reused item each) ----
+        self.overlay = DetectionOverlay(self.plot)
+
         self.plot.setLabel("bottom", "Angle (deg)")
         self.plot.setLabel("left", "Range (m)")
         self.plot.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
         root.addWidget(self.plot, stretch=1)
 
+        # -------- STATS OVERLAY --------
+        self.stats_overlay = QLabel(self.plot)
+        self.stats_overlay.setStyleSheet(
+            "background-color: rgba(0, 0, 0, 160); color: white; font-family: monospace; padding: 4px;"
+        )
+        self.stats_overlay.move(8, 8)
+
         # -------- AUTO TIMER --------
         self.timer = QTimer()
         self.timer.timeout.connect(self.auto_step)
 
+        # -------- RENDER TIMER --------
+        self.render_timer = QTimer()
+        self.render_timer.timeout.connect(self.render_latest)
+
+        # -------- THREAT FLASH TIMER --------
+        self.flash_timer = QTimer()
+        self.flash_timer.timeout.connect(self.flash_threats)
+        self.flash_timer.start(250)
+
+        # -------- STATS TIMER --------
+        self.stats_timer = QTimer()
+        self.stats_timer.timeout.connect(self.update_stats_overlay)
+        self.stats_timer.start(1000)
+
         self.auto_btn.toggled.connect(self.on_mode_change)
+        self.polar_btn.toggled.connect(self.on_binning_change)
+        self.probability_btn.toggled.connect(self.on_display_change)
+        self.stats_btn.toggled.connect(self.stats_overlay.setVisible)
+        self.trails_btn.toggled.connect(self.trails.setVisible)
+        self.clusters_btn.toggled.connect(self.cluster_marks.setVisible)
+        self.clusters_btn.toggled.connect(self.backend.set_clustering)
+        self.backend.set_clustering(self.clusters_btn.isChecked())
+        self.points_btn.toggled.connect(self.overlay.points.setVisible)
+        self.tracks_btn.toggled.connect(self.overlay.tracks.setVisible)
+        self.track_color_btn.toggled.connect(self.on_point_color_change)
         self.plot.scene().sigMouseClicked.connect(self.on_plot_click)
 
     # -------------------------------------------------
@@ -156,14 +310,42 @@ class MainWindow(QWidget):
         }
         self.backend.create_grid(cfg)
 
+    def on_binning_change(self):
+        if self.polar_btn.isChecked():
+            self.backend.set_binning_mode(POLAR)
+            self.plot.setLabel("bottom", "Angle (deg)")
+            self.plot.setLabel("left", "Range (m)")
+        else:
+            self.backend.set_binning_mode(CARTESIAN)
+            self.plot.setLabel("bottom", "X (m)")
+            self.plot.setLabel("left", "Y (m)")
+
+    def on_display_change(self):
+        if self.grid is None:
+            return
+        self.image.setLookupTable(self._current_lut())
+        # Force a repaint of the current state in the new view
+        self._shown_update = -1
+        self.render_latest()
+
+    def on_point_color_change(self):
+        self.overlay.color_by = TRACK if self.track_color_btn.isChecked() else SNR
+        self._shown_update = -1
+        self.render_latest()
+
+    def _current_lut(self):
+        return self.prob_lut if self.probability_btn.isChecked() else self.occ_lut
+
     # -------------------------------------------------
     # GRID INITIALIZATION (ON CREATE GRID)
     # -------------------------------------------------
     def update_grid(self, grid):
         self.current_index = 0
 
-        # Occupancy grid (0/1 only)
+        # Display buffers, filled in place from the backend occupancy grid
         self.grid = np.zeros_like(grid, dtype=np.uint8)
+        self.prob = np.full_like(grid, 0.5, dtype=np.float32)
+        self._shown_update = -1
 
         x_min, x_max = self.xmin.value(), self.xmax.value()
         y_min, y_max = self.ymin.value(), self.ymax.value()
@@ -171,15 +353,15 @@ class MainWindow(QWidget):
 
         # Reset image (reshape-safe)
         self.plot.removeItem(self.image)
-        self.image = pg.ImageItem()
+        self.image = pg.ImageItem(axisOrder='row-major')
         self.plot.addItem(self.image)
 
         self.image.setImage(
-            self.grid.T,
+            self.grid,
             autoLevels=False,
             levels=(0, 1)
         )
-        self.image.setLookupTable(self.occ_lut)
+        self.image.setLookupTable(self._current_lut())
 
         self.image.setRect(
             x_min,
@@ -188,6 +370,16 @@ class MainWindow(QWidget):
             y_max - y_min
         )
 
+        # Threat overlay over the same lattice
+        self.plot.removeItem(self.threat_image)
+        self.threat_image = pg.ImageItem(axisOrder='row-major')
+        self.threat_image.setZValue(5)
+        self.plot.addItem(self.threat_image)
+        self.threat_image.setImage(self.grid, autoLevels=False, levels=(0, 2))
+        self.threat_image.setLookupTable(self.threat_lut)
+        self.threat_image.setRect(x_min, y_min, x_max - x_min, y_max - y_min)
+        self.threat_image.setVisible(False)
+
         self.plot.setXRange(x_min, x_max, padding=0)
         self.plot.setYRange(y_min, y_max, padding=0)
 
@@ -197,30 +389,129 @@ class MainWindow(QWidget):
         self.plot.getAxis("left").setTicks([y_ticks])
 
         self.highlight.setVisible(False)
+        self.selected_bin = None
+        self.bin_info.setText("No bin selected")
+        self.overlay.clear()
 
     # -------------------------------------------------
-    # BACKEND RADAR UPDATE (OCCUPANCY ONLY)
+    # BACKEND OCCUPANCY UPDATE
     # -------------------------------------------------
-    def update_radar_points(self, points):
-        if self.grid is None:
+    def on_frame(self, frame):
+        self.render_latest()
+
+    def render_latest(self):
+        """Repaint from the backend occupancy grid if it changed since the last repaint."""
+        occupancy = self.backend.occupancy
+        if self.grid is None or occupancy is None or occupancy.shape != self.grid.shape:
             return
 
-        # Clear grid (all red)
-        self.grid.fill(0)
+        updates = occupancy.updates
+        if updates == self._shown_update:
+            return
+        if self._shown_update >= 0:
+            self.frames_skipped += max(0, updates - self._shown_update - 1)
+        self._shown_update = updates
 
-        # Mark detected bins green
-        for p in points:
-            ix = int(p['x'])
-            iy = int(p['y'])
-            if 0 <= iy < self.grid.shape[0] and 0 <= ix < self.grid.shape[1]:
-                self.grid[iy, ix] = 1
+        # Update image in place from the row-major buffers (NO reshape, NO transpose)
+        if self.probability_btn.isChecked():
+            view = occupancy.probability(self.prob)
+        else:
+            view = occupancy.occupied(self.grid)
+        self.image.setImage(view, autoLevels=False, levels=(0, 1))
+
+        self.render_detections()
+        if self.trails_btn.isChecked():
+            self.render_trails()
+        if self.clusters_btn.isChecked():
+            self.render_clusters()
+        self.render_threats()
+        if self.selected_bin is not None:
+            self.render_bin_stats()
+
+        arrival = self.backend.last_frame_timestamp
+        if arrival:
+            self._display_latency.observe((time.monotonic() - arrival) * 1e6)
+        self.frames_shown += 1
+        text = f"Frames shown: {self.frames_shown}  skipped: {self.frames_skipped}"
+        if self.overlay.drawn < self.overlay.total:
+            text += f"\nPoints drawn: {self.overlay.drawn} of {self.overlay.total}"
+        self.render_stats.setText(text)
+
+    def render_detections(self):
+        """Draw the newest frame's point cloud and tracks."""
+        frame, binner = self.backend.latest_frame, self.backend.binner
+        if frame is None or binner is None:
+            return
+        self.overlay.update(frame, binner)
 
-        # Update image only (NO reshape, NO axis change)
-        self.image.setImage(
-            self.grid.T,
-            autoLevels=False,
-            levels=(0, 1)
+    def render_trails(self):
+        """Draw the last TRAIL_SECONDS of every track as one batched polyline item."""
+        binner = self.backend.binner
+        if binner is None:
+            return
+        x, y = self.backend.track_history.trails(since=self.backend.last_frame_timestamp - TRAIL_SECONDS)
+        u, v = binner.to_grid_coords(x, y)
+        self.trails.setData(u, v, connect='finite')
+
+    def render_clusters(self):
+        """Mark the point-cloud cluster centroids of the newest frame."""
+        binner = self.backend.binner
+        if binner is None:
+            return
+        centroid = self.backend.clusters['centroid']
+        u, v = binner.to_grid_coords(centroid[:, 0], centroid[:, 1])
+        self.cluster_marks.setData(u, v)
+
+    def render_threats(self):
+        """Show the threatened cells and describe the most urgent threat."""
+        threat_map = self.backend.threat_map
+        if threat_map is None or threat_map.shape != self.grid.shape:
+            self.threat_image.setVisible(False)
+        else:
+            self.threat_image.setImage(threat_map, autoLevels=False, levels=(0, 2))
+            self.threat_image.setVisible(True)
+
+        threats = self.backend.collision.threats
+        alerting = threats[threats['level'] >= CAUTION]
+        if len(alerting) == 0:
+            self.alert_label.setText("No threats")
+            self.alert_label.setStyleSheet("")
+            return
+        worst = alerting[np.lexsort((alerting['ttc'], -alerting['level'].astype(int)))[0]]
+        level = "WARNING" if worst['level'] == WARNING else "Caution"
+        self.alert_label.setText(
+            f"{level}: vehicle at {worst['range']:.0f} m, TTC {worst['ttc']:.1f} s, "
+            f"passing {worst['clearance']:.1f} m ({len(alerting)} threat{'s' if len(alerting) > 1 else ''})"
+        )
+        color = "#ff00ff" if worst['level'] == WARNING else "#ffa500"
+        self.alert_label.setStyleSheet(f"color: white; background-color: {color}; font-weight: bold; padding: 4px;")
+
+    def flash_threats(self):
+        """Blink the threat overlay while anything is alerting."""
+        self._flash_on = not self._flash_on
+        self.threat_image.setOpacity(1.0 if self._flash_on else 0.3)
+
+    def update_stats_overlay(self):
+        """Refresh the overlay from the backend metrics snapshot (once per second)."""
+        if not self.stats_btn.isChecked():
+            return
+        m = self.backend.metrics.snapshot()
+        now = time.monotonic()
+        last_t, last_frames = self._stats_last
+        fps = (m["frames_published"] - last_frames) / max(now - last_t, 1e-6)
+        self._stats_last = (now, m["frames_published"])
+
+        parse, latency, display = m["parse_us"], m["latency_us"], m["display_latency_us"]
+        self.stats_overlay.setText(
+            f"{fps:5.1f} fps   frames {m['frames_received']}\n"
+            f"parse   p50 {parse['p50'] / 1000:6.2f} ms  p99 {parse['p99'] / 1000:6.2f} ms\n"
+            f"latency p50 {latency['p50'] / 1000:6.2f} ms  p99 {latency['p99'] / 1000:6.2f} ms\n"
+            f"display p50 {display['p50'] / 1000:6.2f} ms  p99 {display['p99'] / 1000:6.2f} ms\n"
+            f"drops raw {m['raw_queue_drops']} frame {m['frame_queue_drops']}  "
+            f"errors parse {m['parse_errors']} tlv {m['tlv_errors']}\n"
+            f"resyncs {m['sync_resyncs']}  discarded {m['sync_bytes_discarded']} B"
         )
+        self.stats_overlay.adjustSize()
 
     # -------------------------------------------------
     def on_mode_change(self):
@@ -276,6 +567,31 @@ class MainWindow(QWidget):
         self.highlight.setSize([self.dx.value(), self.dy.value()])
         self.highlight.setVisible(True)
 
+        self.selected_bin = (ix, iy)
+        self.render_bin_stats()
+
+    def render_bin_stats(self):
+        """Describe the highlighted bin from the backend per-cell statistics."""
+        ix, iy = self.selected_bin
+        stats = self.backend.bin_stats.cell(ix, iy)
+        if stats is None:
+            return
+        x = self.xmin.value() + ix * self.dx.value()
+        y = self.ymin.value() + iy * self.dy.value()
+        if self.polar_btn.isChecked():
+            where = f"{x:g}..{x + self.dx.value():g} deg, {y:g}..{y + self.dy.value():g} m"
+        else:
+            where = f"x {x:g}..{x + self.dx.value():g} m, y {y:g}..{y + self.dy.value():g} m"
+
+        text = f"Bin ({ix}, {iy}): {where}"
+        if stats['track_hits']:
+            text += (f"\n{stats['track_hits']} hits, {stats['dwell_s']:.1f} s dwell, "
+                     f"{stats['mean_speed']:.1f} m/s, conf {stats['mean_confidence']:.2f}"
+                     f"\nLast seen frame {stats['last_seen']}, {stats['age_s']:.1f} s ago")
+        else:
+            text += "\nNever hit"
+        self.bin_info.setText(text)
+
     # -------------------------------------------------
     def export_plot(self):
         if self.grid is None:
@@ -293,3 +609,17 @@ class MainWindow(QWidget):
         exporter = pg_exporters.ImageExporter(self.plot.getPlotItem())
         exporter.parameters()['width'] = 1920
         exporter.export(file_path)
+
+    def export_session(self, checked):
+        """Start/stop streaming decoded tracks, points and occupancy snapshots to a directory."""
+        if not checked:
+            self.backend.stop_export()
+            self.session_btn.setText("Export Session")
+            return
+
+        directory = QFileDialog.getExistingDirectory(self, "Export Session To")
+        if not directory:
+            self.session_btn.setChecked(False)
+            return
+        self.backend.start_export(Path(directory))
+        self.session_btn.setText("Stop Session Export")
@@ -0,0 +1,100 @@
+"""Point-cloud and track overlay for the occupancy plot.
+
+Each layer is one ScatterPlotItem, reused for every frame and fed whole
+NumPy columns. Colours are looked up in small tables of QBrush objects
+built once: pyqtgraph caches the rendered spot of every (symbol, size,
+pen, brush) it has seen, keyed by the brush object, so reusing the same
+brushes means no new brushes and no new spot pixmaps per frame.
+
+Above ``max_points`` detections only the strongest ``max_points`` (by SNR)
+are drawn, which keeps a repaint within the display budget however dense
+the point cloud gets.
+"""
+import numpy as np
+import pyqtgraph as pg
+
+from backend.tlv import associated
+
+
+# Point colouring
+SNR = "snr"          # SNR ramp
+TRACK = "track"      # colour of the associated track (TLV 1011), grey if none
+
+MAX_POINTS = 2000            # detections drawn per frame before decimating
+SNR_RANGE = (5.0, 40.0)      # SNR mapped onto the ends of the colour ramp
+SNR_LEVELS = 32
+MIN_CONFIDENCE = 0.5         # tracks drawn, as for the occupancy grid
+
+TRACK_COLORS = [
+    (31, 119, 180), (255, 127, 14), (44, 160, 44), (214, 39, 40), (148, 103, 189),
+    (140, 86, 75), (227, 119, 194), (188, 189, 34), (23, 190, 207), (255, 255, 255),
+]
+UNASSOCIATED_COLOR = (128, 128, 128)
+
+
+def _brush_table(colors):
+    """Object array of QBrushes, indexable with an integer array."""
+    table = np.empty(len(colors), dtype=object)
+    table[:] = [pg.mkBrush(*map(int, color[:3])) for color in colors]
+    return table
+
+
+class DetectionOverlay:
+    """Draws a frame's point cloud and tracks on the grid axes of a GridBinner."""
+
+    def __init__(self, plot, max_points=MAX_POINTS):
+        self.max_points = max_points
+        self.color_by = SNR
+
+        self.points = pg.ScatterPlotItem(symbol='o', size=5, pen=None)
+        self.points.setZValue(8)
+        self.tracks = pg.ScatterPlotItem(symbol='s', size=11, pen=pg.mkPen('w', width=1.5))
+        self.tracks.setZValue(12)
+        plot.addItem(self.points)
+        plot.addItem(self.tracks)
+
+        self._snr_brushes = _brush_table(pg.colormap.get('viridis').getLookupTable(nPts=SNR_LEVELS, alpha=False))
+        # Track palette plus one last entry for unassociated points
+        self._track_brushes = _brush_table([*TRACK_COLORS, UNASSOCIATED_COLOR])
+
+        self.total = 0               # detections in the newest frame
+        self.drawn = 0               # of which drawn
+
+    def update(self, frame, binner):
+        """Redraw the visible layers from ``frame``."""
+        if self.points.isVisible():
+            self._update_points(frame, binner)
+        if self.tracks.isVisible():
+            tracks = frame.tracks[frame.tracks['confidence'] >= MIN_CONFIDENCE]
+            u, v = binner.to_grid_coords(tracks['pos'][:, 0], tracks['pos'][:, 1])
+            self.tracks.setData(u, v, brush=self._track_brushes[tracks['tid'] % len(TRACK_COLORS)])
+
+    def _update_points(self, frame, binner):
+        points = frame.points
+        target = frame.target_index if len(frame.target_index) == len(points) else None
+        self.total = len(points)
+        if len(points) > self.max_points:
+            # Level of detail: keep the strongest detections
+            keep = np.argpartition(points['snr'], len(points) - self.max_points)[-self.max_points:]
+            points = points[keep]
+            target = target[keep] if target is not None else None
+        self.drawn = len(points)
+
+        u, v = binner.to_grid_coords(points['x'], points['y'])
+        self.points.setData(u, v, brush=self._point_brushes(points, target))
+
+    def _point_brushes(self, points, target):
+        if self.color_by == TRACK:
+            unassociated = len(TRACK_COLORS)
+            if target is None:
+                return self._track_brushes[np.full(len(points), unassociated)]
+            index = np.where(associated(target), target % len(TRACK_COLORS), unassociated)
+            return self._track_brushes[index]
+        lo, hi = SNR_RANGE
+        index = np.clip((points['snr'] - lo) * ((SNR_LEVELS - 1) / (hi - lo)), 0, SNR_LEVELS - 1).astype(np.intp)
+        return self._snr_brushes[index]
+
+    def clear(self):
+        self.points.clear()
+        self.tracks.clear()
+        self.total = self.drawn = 0